@@ -4,6 +4,8 @@ import time
 import sys
 
 from ai.negamax import Ai
+from ai.ponder import Ponderer
+from ai.solution_table import SolutionAi
 from game.tictactoe import TicTacToe, Piece
 
 #from game.chess import Chess
@@ -12,9 +14,10 @@ from game.tictactoe import TicTacToe, Piece
 PLAYER_MOVE_SEP = ','
 
 
-def main(game, ai):
+def main(game, ai, ponderer=None):
     """
-    Main game loop
+    Main game loop, with `ponderer` (if any) searching
+    the AI's replies while the player thinks
     """
     player_turn = True
     player_piece = ai.player.other()
@@ -22,7 +25,14 @@ def main(game, ai):
     while True:
         print(f'\n{game}')
         if player_turn:
-            if not player_move(game, player_piece):
+            if ponderer is not None:
+                ponderer.start(game)
+
+            moved = player_move(game, player_piece)
+            if ponderer is not None:
+                ponderer.stop()
+
+            if not moved:
                 break
         else:
             if not ai_move(game, ai):
@@ -79,9 +89,9 @@ def ai_move(game, ai):
     return True
 
 
-sys.setrecursionlimit(31)
-
 _game = TicTacToe()
-_ai = Ai(Piece.O)
+_fallback = Ai(Piece.O)
+_ai = SolutionAi(Piece.O, fallback=_fallback)
 
-main(_game, _ai)
+# Pondering helps whenever the solution table can't answer
+main(_game, _ai, Ponderer(_fallback))
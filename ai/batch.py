@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+from collections import namedtuple
+
+import numpy as np
+
+from ai.solution_table import DEFAULT_PATH, HEADER, MAGIC, RECORD_COUNT, NO_MOVE, WIN_LINES
+from game.tictactoe import Piece
+
+
+# Which of the eight lines each square is part of
+LINE_MASKS = np.zeros((9, len(WIN_LINES)), dtype=np.int8)
+for (line, squares) in enumerate(WIN_LINES):
+    LINE_MASKS[squares, line] = 1
+
+# Place value of each square in `TicTacToe.position_index`
+POWERS = 3 ** np.arange(8, -1, -1, dtype=np.int32)
+
+RECORD_DTYPE = np.dtype([('value', np.int8), ('move', np.uint8)])
+
+BatchResult = namedtuple('BatchResult', ['winner', 'terminal', 'value', 'best_move'])
+
+
+def _as_boards(boards) -> np.ndarray:
+    """
+    `boards` as an (N, 9) array of `Piece` values, squares row by row
+    """
+    boards = np.asarray(boards, dtype=np.int8)
+    if boards.ndim != 2 or boards.shape[1] != 9:
+        raise ValueError(f'expected boards of shape (N, 9), got {boards.shape}')
+
+    return boards
+
+
+def winners(boards) -> np.ndarray:
+    """
+    `Piece` value of the winner of each board, or 0 if nobody has won
+
+    >>> winners([[-1, -1, -1, 0, 1, 0, 1, 0, 0], [1, 0, 0, 0, 1, 0, 0, 0, 1], [0] * 9])
+    array([-1,  1,  0], dtype=int8)
+    """
+    line_sums = _as_boards(boards) @ LINE_MASKS
+
+    x_wins = (line_sums == 3 * Piece.X.value).any(axis=1)
+    o_wins = (line_sums == 3 * Piece.O.value).any(axis=1)
+
+    return (o_wins.astype(np.int8) * Piece.O.value) + (x_wins.astype(np.int8) * Piece.X.value)
+
+
+def load_records(path=DEFAULT_PATH) -> np.ndarray:
+    """
+    Memory-map the records of the solution table written by `solution_table.generate`
+    """
+    with open(path, 'rb') as f:
+        (magic, count) = HEADER.unpack(f.read(HEADER.size))
+
+    if magic != MAGIC or count != RECORD_COUNT:
+        raise ValueError(f'{path} is not a tic-tac-toe solution table')
+
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=HEADER.size, shape=(RECORD_COUNT,))
+
+
+def evaluate(boards, records=None, first=Piece.X) -> BatchResult:
+    """
+    Winner, whether the game is over, solved value for the player to
+    move and best square (i * 3 + j, or -1) of every board at once
+
+    The player to move follows from the piece counts, given which
+    player moved `first`. `records` defaults to the table at `DEFAULT_PATH`.
+    Unreachable boards get `solution_table.UNKNOWN` as their value.
+
+    >>> import os, tempfile
+    >>> from ai.solution_table import generate
+    >>> path = os.path.join(tempfile.mkdtemp(), 'tictactoe.solution')
+    >>> generate(path)
+    >>> result = evaluate([[-1, -1, 0, 0, 1, 0, 0, 0, 1], [-1, -1, -1, 1, 1, 0, 0, 0, 0]], load_records(path))
+    >>> result.winner
+    array([ 0, -1], dtype=int8)
+    >>> result.terminal
+    array([False,  True])
+    >>> result.value
+    array([  9, -10], dtype=int8)
+    >>> result.best_move
+    array([ 2, -1], dtype=int16)
+    """
+    boards = _as_boards(boards)
+    if records is None:
+        records = load_records()
+
+    winner = winners(boards)
+    # Also over if both have a line, which `winner` can't express
+    completed = (np.abs(boards @ LINE_MASKS) == 3).any(axis=1)
+    terminal = completed | (boards != Piece.S.value).all(axis=1)
+
+    # X moves when it has played as many pieces as O, or one
+    # fewer if O went first (`Piece.value % 3` digits as in the table)
+    lead = (boards == Piece.X.value).sum(axis=1) - (boards == Piece.O.value).sum(axis=1)
+    o_to_move = lead == (1 if first == Piece.X else 0)
+    index = ((boards % 3).astype(np.int32) @ POWERS) * 2 + o_to_move
+
+    found = records[index]
+    value = np.array(found['value'])
+    best_move = found['move'].astype(np.int16)
+    best_move[best_move == NO_MOVE] = -1
+
+    return BatchResult(winner, terminal, value, best_move)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
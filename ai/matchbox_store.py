@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+import os
+import mmap
+import struct
+from array import array
+
+from ai.menace import POSITION_COUNT, SQUARES
+
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'menace.matchboxes')
+
+MAGIC = b'MNCE'
+# Magic, positions and squares per position, padded so the records stay
+# aligned. Followed by one record of `SQUARES` native ints per position index
+HEADER = struct.Struct('<4sII4x')
+# Bytes in a whole file
+FILE_SIZE = HEADER.size + POSITION_COUNT * SQUARES * array('i').itemsize
+
+
+def empty_matchboxes() -> array:
+    """
+    Bead counts of a `Menace` that has never played
+    """
+    return array('i', [0]) * (POSITION_COUNT * SQUARES)
+
+
+def save(matchboxes, path=DEFAULT_PATH):
+    """
+    Write `matchboxes` to `path`, replacing the old file only
+    once the new one is complete, so a crash leaves one or the other
+    """
+    with open(path + '.tmp', 'wb') as f:
+        f.write(HEADER.pack(MAGIC, POSITION_COUNT, SQUARES))
+        f.write(matchboxes)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(path + '.tmp', path)
+
+
+class MatchboxStore(object):
+    """
+    Menace matchboxes stored in a file with one fixed-size `RECORD` per
+    position index, memory-mapped so loading never parses anything and
+    processes reading the same file share its pages
+
+    Changes to `matchboxes` stay private to this process (pages are
+    only copied once written) until written back with `save`
+
+    >>> import tempfile
+    >>> from ai.menace import Menace, train
+    >>> path = os.path.join(tempfile.mkdtemp(), 'menace.matchboxes')
+    >>> store = MatchboxStore(path)
+    >>> menace = Menace(seed=0, matchboxes=store.matchboxes)
+    >>> _ = train(menace, 50)
+    >>> store.save(menace.matchboxes)
+    >>> reader = MatchboxStore(path)
+    >>> list(reader.matchboxes) == list(menace.matchboxes)
+    True
+    >>> reader.reload()
+    False
+
+    A file cut short is refused, keeping the matchboxes mapped before
+
+    >>> with open(path, 'r+b') as f:
+    ...     _ = f.truncate(FILE_SIZE - 4)
+    >>> reader.reload()  # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    ...
+    ValueError: .../menace.matchboxes is truncated, expected ... bytes but found ...
+    >>> list(reader.matchboxes) == list(menace.matchboxes)
+    True
+    """
+    def __init__(self, path=DEFAULT_PATH):
+        self._path = path
+        self._stat = None
+        self._matchboxes = empty_matchboxes()
+        self.reload()
+
+    def reload(self) -> bool:
+        """
+        Map the file again if it was replaced since it was last mapped
+        """
+        try:
+            stat = os.stat(self._path)
+        except FileNotFoundError:
+            return False
+
+        if self._stat is not None and (stat.st_ino, stat.st_mtime_ns) == (self._stat.st_ino, self._stat.st_mtime_ns):
+            return False
+
+        if stat.st_size < FILE_SIZE:
+            raise ValueError(f'{self._path} is truncated, expected {FILE_SIZE} bytes but found {stat.st_size}')
+
+        with open(self._path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), FILE_SIZE, access=mmap.ACCESS_COPY)
+
+        (magic, positions, squares) = HEADER.unpack_from(mapped)
+        if magic != MAGIC or positions != POSITION_COUNT or squares != SQUARES:
+            raise ValueError(f'{self._path} is not a MENACE matchbox file')
+
+        # The old mapping closes once nothing uses its matchboxes any more
+        self._matchboxes = memoryview(mapped)[HEADER.size:].cast('i')
+        self._stat = stat
+        return True
+
+    def save(self, matchboxes=None):
+        """
+        Write `matchboxes` (by default this store's) back to the
+        file in one atomic replace, and map the new file
+        """
+        save(self._matchboxes if matchboxes is None else matchboxes, self._path)
+        self.reload()
+
+    @property
+    def matchboxes(self):
+        """
+        Bead counts, `SQUARES` per canonical position index
+        """
+        return self._matchboxes
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+
+import math
+import time
+import random
+from enum import Enum
+from array import array
+
+from game.game_abc import Game
+
+
+# Iterations per search when no budget is given
+DEFAULT_ITERATIONS = 2000
+# UCT exploration constant, the usual choice for rewards between 0 and 1
+EXPLORATION = math.sqrt(2)
+# Random playouts run from each new leaf, sharing one walk down and back up the tree
+BATCH_SIZE = 4
+# Plies a playout may last before `evaluate` judges the position instead
+PLAYOUT_DEPTH = 60
+# `evaluate` difference that makes a win about e (2.7) times as likely as a loss
+EVALUATION_SCALE = 4
+# Nodes the tree may hold, after which leaves are played out without expanding
+MAX_NODES = 1 << 20
+
+
+class MctsAi(object):
+    """
+    AI which uses Monte Carlo tree search with UCT (upper confidence
+    bounds on trees) to pick the best move for a given game state
+
+    Shares the `negamax`/`get_best_move`/`player` surface of `Ai`. The
+    tree is kept in parallel arrays indexed by node number, with the
+    children of each node stored next to each other. When the next
+    search starts two plies later, the subtree for the moves actually
+    played is kept, so earlier playouts still count
+
+    Rewards are 1 for a win, 0 for a loss and 0.5 for a draw. Playouts
+    cut short after `playout_depth` plies, or once the time budget runs
+    out, are scored from the game's `evaluate` instead
+    """
+    def __init__(
+        self, player: Enum, iterations=DEFAULT_ITERATIONS, exploration=EXPLORATION,
+        batch_size=BATCH_SIZE, playout_depth=PLAYOUT_DEPTH, max_nodes=MAX_NODES, seed=None
+    ):
+        self._player = player
+        self._iterations = iterations
+        self._exploration = exploration
+        self._batch_size = batch_size
+        self._playout_depth = playout_depth
+        self._max_nodes = max_nodes
+        self._random = random.Random(seed)
+        self._deadline = None
+        self._clear()
+
+    def _clear(self):
+        """
+        Empty the tree
+        """
+        self._parents = array('i')
+        # Index of each node's first child, or -1 until it is expanded
+        self._first_children = array('i')
+        self._child_counts = array('i')
+        self._visits = array('i')
+        # Total reward of the player who made the move leading to each node
+        self._rewards = array('d')
+        self._moves = list()
+        # `hash_key` of each node's position, once visited
+        self._hashes = list()
+
+    def _add_node(self, parent: int, move: object) -> int:
+        """
+        Append an unexpanded node and return its index
+        """
+        self._parents.append(parent)
+        self._first_children.append(-1)
+        self._child_counts.append(0)
+        self._visits.append(0)
+        self._rewards.append(0.0)
+        self._moves.append(move)
+        self._hashes.append(None)
+
+        return len(self._moves) - 1
+
+    def negamax(self, game: Game, time_limit=None, iterations=None):
+        """
+        Use Monte Carlo tree search to find the best move in given
+        game state, for `iterations` iterations (by default the number
+        given when created) or, given a `time_limit` (seconds), as many
+        as fit in it
+
+        >>> from game.tictactoe import Piece
+        >>> from game.bitboard import BitboardTicTacToe
+        >>> game = BitboardTicTacToe()
+        >>> game.move(Piece.X, (1, 1))
+        >>> ai = MctsAi(Piece.O, iterations=500, seed=1)
+        >>> ai.negamax(game)
+        >>> ai.get_best_move() in [(0, 0), (0, 2), (2, 0), (2, 2)]
+        True
+
+        The subtree of the moves played since is kept for the next search
+
+        >>> game.move(Piece.O, ai.get_best_move())
+        >>> game.move(Piece.X, next(game.allowed_moves(Piece.X)))
+        >>> ai.negamax(game)
+        >>> ai._visits[0] > 500 * ai._batch_size
+        True
+
+        Takes a win rather than blocking
+
+        >>> game = BitboardTicTacToe()
+        >>> for (piece, move) in [(Piece.X, (0, 1)), (Piece.O, (0, 0)), (Piece.X, (1, 2)), (Piece.O, (2, 0)), (Piece.X, (1, 1))]:
+        ...     game.move(piece, move)
+        >>> ai.negamax(game, time_limit=0.2)
+        >>> ai.get_best_move()
+        (1, 0)
+
+        Playouts stop as soon as the time runs out, however long they are
+
+        >>> import time
+        >>> from game.chess import Chess, Player
+        >>> ai = MctsAi(Player.W, seed=1)
+        >>> start_time = time.perf_counter()
+        >>> ai.negamax(Chess(), time_limit=0.1)
+        >>> time.perf_counter() - start_time < 0.3
+        True
+        """
+        self._find_root(game)
+
+        if time_limit is None and iterations is None:
+            iterations = self._iterations
+        self._deadline = None if time_limit is None else time.perf_counter() + time_limit
+
+        done = 0
+        while iterations is None or done < iterations:
+            self._iterate(game)
+            done += 1
+
+            # One chess iteration can take tens of milliseconds, so check after every one
+            if self._deadline is not None and time.perf_counter() >= self._deadline:
+                break
+
+    def _find_root(self, game: Game):
+        """
+        Make the node for the position in `game` the root, keeping its
+        subtree if it is the root or one of its grandchildren, and
+        otherwise starting a new tree
+        """
+        key = game.hash_key()
+        root = None
+
+        if len(self._moves) > 0:
+            if self._hashes[0] == key:
+                return
+
+            for child in self._children(0):
+                root = next((grandchild for grandchild in self._children(child) if self._hashes[grandchild] == key), None)
+                if root is not None:
+                    break
+
+        if root is None:
+            self._clear()
+            self._add_node(-1, None)
+        else:
+            self._keep_subtree(root)
+
+        self._hashes[0] = key
+
+    def _children(self, node: int) -> range:
+        first = self._first_children[node]
+        return range(first, first + self._child_counts[node]) if first >= 0 else range(0)
+
+    def _keep_subtree(self, root: int):
+        """
+        Copy the subtree under `root` into a new tree with `root` as node 0
+        """
+        (parents, first_children, child_counts, visits, rewards, moves, hashes) = (
+            self._parents, self._first_children, self._child_counts,
+            self._visits, self._rewards, self._moves, self._hashes
+        )
+        self._clear()
+
+        # Copied nodes paired with their new index, in breadth-first order so siblings stay together
+        queue = [(root, self._add_node(-1, None))]
+        for (old, new) in queue:
+            self._visits[new] = visits[old]
+            self._rewards[new] = rewards[old]
+            self._hashes[new] = hashes[old]
+
+            if first_children[old] >= 0:
+                self._first_children[new] = len(self._moves)
+                self._child_counts[new] = child_counts[old]
+                for child in range(first_children[old], first_children[old] + child_counts[old]):
+                    queue.append((child, self._add_node(new, moves[child])))
+
+    def _iterate(self, game: Game):
+        """
+        One iteration: select a leaf by UCT, expand it, play
+        `batch_size` random games from it and back up the rewards
+        """
+        node = 0
+        player = self._player
+        depth = 0
+
+        while self._child_counts[node] > 0:
+            node = self._select(node)
+            game.move(player, self._moves[node], enqueue=True)
+            player = game.other(player)
+            depth += 1
+            if self._hashes[node] is None:
+                self._hashes[node] = game.hash_key()
+
+        if self._first_children[node] < 0 and len(self._moves) < self._max_nodes and not game.is_over():
+            self._expand(node, game, player)
+            if self._child_counts[node] > 0:
+                node = self._first_children[node]
+                game.move(player, self._moves[node], enqueue=True)
+                player = game.other(player)
+                depth += 1
+                self._hashes[node] = game.hash_key()
+
+        batch_size = self._batch_size
+        reward = sum(self._playout(game, player) for _ in range(batch_size))
+
+        for _ in range(depth):
+            game.undo_move()
+
+        # Nodes at odd depths were moved into by this AI's player
+        while node >= 0:
+            self._visits[node] += batch_size
+            self._rewards[node] += reward if depth % 2 == 1 else batch_size - reward
+            node = self._parents[node]
+            depth -= 1
+
+    def _select(self, node: int) -> int:
+        """
+        Child of `node` with the highest upper confidence bound,
+        or the first one that has never been visited
+        """
+        visits = self._visits
+        rewards = self._rewards
+        exploration = self._exploration * math.sqrt(math.log(visits[node]))
+        best = (-1.0, None)
+
+        for child in self._children(node):
+            if visits[child] == 0:
+                return child
+
+            bound = rewards[child] / visits[child] + exploration / math.sqrt(visits[child])
+            if bound > best[0]:
+                best = (bound, child)
+
+        return best[1]
+
+    def _expand(self, node: int, game: Game, player: Enum):
+        """
+        Add a child of `node` for every move of `player`, in random order
+        so that ties between unvisited moves are broken fairly
+        """
+        moves = list(game.allowed_moves(player))
+        self._random.shuffle(moves)
+
+        self._first_children[node] = len(self._moves)
+        self._child_counts[node] = len(moves)
+        for move in moves:
+            self._add_node(node, move)
+
+    def _playout(self, game: Game, player: Enum) -> float:
+        """
+        Reward for this AI's player of a random game
+        from the current state, with `player` to move
+        """
+        plies = 0
+        deadline = self._deadline
+        while plies < self._playout_depth and not game.is_over():
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+
+            game.move(player, self._random.choice(list(game.allowed_moves(player))), enqueue=True)
+            player = game.other(player)
+            plies += 1
+
+        if game.is_winner(self._player):
+            reward = 1.0
+        elif game.is_winner(game.other(self._player)):
+            reward = 0.0
+        elif game.is_over():
+            reward = 0.5
+        else:
+            reward = 1 / (1 + math.exp(-game.evaluate(self._player) / EVALUATION_SCALE))
+
+        for _ in range(plies):
+            game.undo_move()
+
+        return reward
+
+    def get_best_move(self):
+        """
+        Most visited move at the root of the last search
+
+        >>> ai = MctsAi(None)
+        >>> ai.get_best_move() == None
+        True
+        """
+        if len(self._moves) == 0 or self._child_counts[0] == 0:
+            return None
+
+        return self._moves[max(self._children(0), key=self._visits.__getitem__)]
+
+    @property
+    def player(self):
+        return self._player
+
+    @property
+    def nodes(self):
+        """
+        Number of nodes in the search tree
+        """
+        return len(self._moves)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -1,9 +1,27 @@
 #!/usr/bin/env python3
 
+import sys
+import time
+import random
+import argparse
 from enum import Enum
-from collections import deque
+from array import array
+from collections import Counter
 
 from game.game_abc import Game
+from game.bitboard import BitboardTicTacToe, POWERS
+from game.tictactoe import Piece, SYMMETRIES
+
+
+# Positions counted by `TicTacToe.position_index`, and squares per matchbox
+POSITION_COUNT = 3 ** 9
+SQUARES = 9
+
+# Square (i * 3 + j) that each square is moved to by each of `SYMMETRIES`
+SYMMETRY_SQUARES = [
+    [(lambda i, j: i * 3 + j)(*symmetry(*divmod(square, 3))) for square in range(SQUARES)]
+    for symmetry in SYMMETRIES
+]
 
 
 class GameEnd(Enum):
@@ -12,38 +30,226 @@ class GameEnd(Enum):
     DRAW = 1
 
 
+def game_end(player: Enum, winner: Enum) -> GameEnd:
+    """
+    How a game won by `winner` (None for a draw) ended for `player`
+    """
+    if winner is None:
+        return GameEnd.DRAW
+
+    return GameEnd.WIN if winner == player else GameEnd.LOSE
+
+
+def canonical_position(position_index: int) -> tuple:
+    """
+    Smallest position index of any rotation or reflection of the board with
+    `position_index`, and where each square ends up in that orientation
+
+    >>> canonical_position(2 * 3 ** 8)[0]
+    2
+    >>> canonical_position(2)
+    (2, (0, 1, 2, 3, 4, 5, 6, 7, 8))
+    """
+    digits = [position_index // power % 3 for power in POWERS]
+    best = None
+
+    for squares in SYMMETRY_SQUARES:
+        index = sum(digit * POWERS[square] for (digit, square) in zip(digits, squares))
+        if best is None or index < best[0]:
+            best = (index, tuple(squares))
+
+    return best
+
+
 class Menace(object):
-    _matchboxes = dict()
-    _history = deque()
+    """
+    MENACE (Matchbox Educable Noughts And Crosses Engine) for tic-tac-toe
+    games with a `position_index`, such as `BitboardTicTacToe`
+
+    Keeps one matchbox per position up to symmetry, holding a bead count
+    for each square. Moves are drawn in proportion to the beads, and the
+    beads of every move played are changed by the `GameEnd` value
+    once the game is over. Matchboxes start with `default_beads` for
+    each allowed move, and are filled again if they ever run out.
 
-    def __init__(self, default_beads=3):
+    `matchboxes` can be any writable buffer of `SQUARES` ints per
+    position index, such as a `matchbox_store.MatchboxStore`'s
+    """
+    def __init__(self, default_beads=3, seed=None, matchboxes=None):
         self._default_beads = default_beads
+        self._random = random.Random(seed)
+        # `SQUARES` bead counts for every canonical position index
+        if matchboxes is None:
+            matchboxes = array('i', [0]) * (POSITION_COUNT * SQUARES)
+        self._beads = matchboxes
+        # Canonical index and square mapping by position index, filled in as positions are seen
+        self._canonical = dict()
+        # Bead slots of the moves played this game by each player
+        self._history = {Piece.X: list(), Piece.O: list()}
 
-    def best_move(game: Game, player: Enum) -> object:
+    def _matchbox(self, game: Game, player: Enum) -> tuple:
         """
-        Get best move based on number of beads
+        Offset of the matchbox for the position in `game` and the square
+        mapping into its orientation, filling the matchbox if it is empty
         """
-        game_state = str(game)
+        position_index = game.position_index()
+        if position_index not in self._canonical:
+            self._canonical[position_index] = canonical_position(position_index)
 
-        if game_state not in self._matchboxes:
-            self._matchboxes[game_state] = dict()
-            allowed_moves = game.allowed_moves(player)
+        (canonical_index, squares) = self._canonical[position_index]
+        offset = canonical_index * SQUARES
+        beads = self._beads
 
-            for move in allowed_moves:
-                self._matchboxes[game_state][move] = self._default_beads
-            
-        current_matchbox = self._matchboxes[game_state]
-        if len(current_matchbox) == 0:
-            return None
-        
-        best_move = max(current_matchbox, key=current_matchbox.get)
-        self._history.appendleft((game_state, best_move))
+        if not any(beads[offset:offset + SQUARES]):
+            for move in game.allowed_moves(player):
+                beads[offset + squares[move[0] * 3 + move[1]]] = self._default_beads
 
-        return best_move
+        return (offset, squares)
 
-    def update(game_end: GameEnd):
+    def best_move(self, game: Game, player: Enum) -> object:
         """
-        Update number of beads in used matchboxes after game is over
+        Draw a move for `player` from the matchbox of the current position
+
+        >>> game = BitboardTicTacToe()
+        >>> game.move(Piece.X, (0, 0))
+        >>> menace = Menace(seed=0)
+        >>> menace.best_move(game, Piece.O) in list(game.allowed_moves(Piece.O))
+        True
         """
-        for (game_state, best_move) in self._history:
-            self._matchboxes[game_state][best_move] += game_end.value
+        (offset, squares) = self._matchbox(game, player)
+        beads = self._beads
+
+        pick = self._random.randrange(sum(beads[offset:offset + SQUARES]) or 1)
+        for (square, canonical_square) in enumerate(squares):
+            pick -= beads[offset + canonical_square]
+            if pick < 0:
+                self._history[player].append(offset + canonical_square)
+                return divmod(square, 3)
+
+        return None
+
+    def beads(self, game: Game, player: Enum) -> dict:
+        """
+        Bead count of every allowed move for `player` in the current position
+
+        >>> Menace(default_beads=4).beads(BitboardTicTacToe(), Piece.X)[(1, 1)]
+        4
+        """
+        (offset, squares) = self._matchbox(game, player)
+        return {move: self._beads[offset + squares[move[0] * 3 + move[1]]] for move in game.allowed_moves(player)}
+
+    def update(self, game_end: GameEnd, player: Enum):
+        """
+        Add or take away beads for the moves `player` played in the game just over
+        """
+        beads = self._beads
+        history = self._history[player]
+
+        for slot in history:
+            beads[slot] = max(beads[slot] + game_end.value, 0)
+
+        history.clear()
+
+    @property
+    def matchboxes(self):
+        """
+        Bead counts, `SQUARES` per canonical position index
+        """
+        return self._beads
+
+
+def train(menace: Menace, games: int, opponent=None) -> Counter:
+    """
+    Play `games` games of tic-tac-toe with X moving first, updating
+    `menace` after each. Without an `opponent` MENACE plays both sides,
+    otherwise it takes turns playing X and O against engines made by
+    `opponent(player)`, such as `Ai` or `SolutionAi`
+
+    Returns how many games X and O won (None for draws), or
+    with an opponent, MENACE's count of each `GameEnd`
+
+    >>> from ai.random_ai import RandomAi
+    >>> menace = Menace(seed=1)
+    >>> results = train(menace, 300, lambda player: RandomAi(player, seed=2))
+    >>> sum(results.values())
+    300
+    >>> results[GameEnd.WIN] > results[GameEnd.LOSE]
+    True
+    """
+    engines = {Piece.X: None, Piece.O: None}
+    if opponent is not None:
+        opponents = {player: opponent(player) for player in (Piece.X, Piece.O)}
+
+    results = Counter()
+    for number in range(games):
+        if opponent is not None:
+            menace_player = Piece.X if number % 2 == 0 else Piece.O
+            engines = {menace_player: None, menace_player.other(): opponents[menace_player.other()]}
+
+        game = BitboardTicTacToe()
+        player = Piece.X
+
+        while not game.is_over():
+            engine = engines[player]
+            if engine is None:
+                move = menace.best_move(game, player)
+            else:
+                engine.negamax(game)
+                move = engine.get_best_move()
+
+            game.move(player, move)
+            player = player.other()
+
+        winner = next((piece for piece in (Piece.X, Piece.O) if game.is_winner(piece)), None)
+        for (piece, engine) in engines.items():
+            if engine is None:
+                menace.update(game_end(piece, winner), piece)
+
+        results[winner if opponent is None else game_end(menace_player, winner)] += 1
+
+    return results
+
+
+def main(argv: list):
+    from ai.negamax import Ai
+    from ai.random_ai import RandomAi
+    from ai.solution_table import SolutionAi
+
+    opponents = {
+        'self': None,
+        'negamax': lambda player: Ai(player),
+        'solution': lambda player: SolutionAi(player, fallback=Ai(player)),
+        'random': lambda player: RandomAi(player)
+    }
+
+    parser = argparse.ArgumentParser(description='Train MENACE')
+    parser.add_argument('--games', type=int, default=100000)
+    parser.add_argument('--opponent', choices=opponents, default='self')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--store', help='matchbox file to continue training from and save to')
+    parser.add_argument('--batch', type=int, default=100000, help='games between saves to --store')
+    args = parser.parse_args(argv)
+
+    store = None
+    if args.store is not None:
+        from ai.matchbox_store import MatchboxStore
+        store = MatchboxStore(args.store)
+
+    menace = Menace(seed=args.seed, matchboxes=None if store is None else store.matchboxes)
+    results = Counter()
+    start_time = time.perf_counter()
+
+    for first in range(0, args.games, args.batch):
+        results.update(train(menace, min(args.batch, args.games - first), opponents[args.opponent]))
+        if store is not None:
+            store.save(menace.matchboxes)
+
+    elapsed = time.perf_counter() - start_time
+
+    print(f'{args.games} games in {elapsed:.2f}s ({args.games / elapsed:.0f} games/s)')
+    for (result, count) in results.items():
+        print(f"  {'draw' if result is None else result.name}: {count}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,46 +1,643 @@
 #!/usr/bin/env python3
 
+import copy
+import time
 from enum import Enum
+from collections import namedtuple
 
 from game.game_abc import Game
 
 
+# Nodes searched between checks of the time budget
+BUDGET_CHECK_INTERVAL = 256
+
+# Width of the window principal variation search tests later moves with. Scores
+# aren't whole numbers, so any gap works as long as it is above rounding error
+NULL_WINDOW = 1e-6
+# How far either side of the last iteration's score the root window reaches
+ASPIRATION_WINDOW = 0.5
+
+# Marks the end of a frame's moves (any move value, even None, may be legal)
+_NO_MOVE = object()
+
+
+# What one search found, enough to answer again at once or search deeper from
+SearchState = namedtuple('SearchState', [
+    'max_depth', 'completed_depth', 'finished', 'best_moves',
+    'previous_value', 'transpositions', 'hash_moves', 'pv_moves'
+])
+
+
+class Bound(Enum):
+    """
+    How a stored transposition value relates to the true value
+    """
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
+
+
+class _SearchAborted(Exception):
+    """
+    Raised when a search runs out of its time or node budget
+    at depth `depth` (so `depth` moves need to be taken back)
+    """
+    def __init__(self, depth: int):
+        super().__init__(depth)
+        self.depth = depth
+
+
 class Ai(object):
     """
     AI which uses the Negamax algorithm to pick 
     the best move for a given game state
+
+    Searches walk the tree with an explicit stack of frames in one call, so
+    depth is not bound by the recursion limit and the per-node bookkeeping
+    is done once per search rather than once per call. With `recursive`
+    they recurse through `_negamax_rec` instead
+
+    With `pvs`, uses principal variation search: only the first move of each
+    node gets the full window, and later moves are just tested against it with
+    a null window and searched again if they turn out better. Iterative
+    deepening then also starts each iteration with an aspiration window
+    around the last one's score, falling back to the full window if the
+    score lands outside it
+
+    Searches of positions found in `ponder_cache` (as filled by an
+    `ai.ponder.Ponderer`) pick up where the cached search left off
     """
-    _best_moves = dict()
+    # Whether `_negamax_stack` reports every node to `_enter_node` and `_exit_node`
+    _instrumented = False
 
-    def __init__(self, player: Enum):
+    def __init__(self, player: Enum, max_depth=10, ordering=None, recursive=False, pvs=False):
         self._player = player
+        self._recursive = recursive
+        self._pvs = pvs
+        # Saved state of each ply's node for `_negamax_stack`, lengthened if a search goes deeper
+        self._frames = [None] * (max_depth + 2)
+        self._best_moves = dict()
+        self._max_depth = max_depth
+        self._depth_limit = max_depth
+        self._ordering = ordering
+        self._transpositions = dict()
+        self._hash_moves = dict()
+        self._previous_best = None
+        self._previous_value = None
+        # Best move by `hash_key` of every position whose exact value is known
+        self._pv_moves = dict()
+        self._principal_variation = list()
+        self._completed_depth = None
+        self._finished = False
+        self._horizon_reached = False
+        self._nodes = 0
+        self._next_check = float('inf')
+        self._node_limit = None
+        self._deadline = None
+        self._stop_requested = False
+        # Whether the node that just returned did so on a transposition table hit
+        self._transposition_cutoff = False
+        # `SearchState` by `hash_key` of positions searched ahead of time
+        self._ponder_cache = dict()
 
-    def negamax(self, game: Game):
+    def negamax(self, game: Game, time_limit=None, node_limit=None):
         """
         Use Negamax algorithm to find best move in given game state
+
+        Given a `time_limit` (seconds) or `node_limit`, searches with
+        iterative deepening instead and keeps the best move of the
+        deepest search that finished within the budget
+
+        >>> from game.tictactoe import Piece
+        >>> from game.bitboard import BitboardTicTacToe
+        >>> game = BitboardTicTacToe()
+        >>> ai = Ai(Piece.O)
+
+        Symmetric root moves are only searched once
+
+        >>> ai.negamax(game)
+        >>> len(ai._best_moves)
+        9
+        >>> len(ai._transpositions) > 0
+        True
+
+        >>> for (piece, move) in [(Piece.X, (0, 0)), (Piece.O, (1, 1)), (Piece.X, (2, 2))]:
+        ...     game.move(piece, move)
+        >>> ai.negamax(game)
+        >>> ai.get_best_move() in [(0, 1), (1, 0), (1, 2), (2, 1)]
+        True
+
+        Takes a win even when the opponent had a win lined up
+
+        >>> game = BitboardTicTacToe()
+        >>> for (piece, move) in [(Piece.X, (0, 1)), (Piece.O, (0, 0)), (Piece.X, (1, 2)), (Piece.O, (2, 0)), (Piece.X, (1, 1))]:
+        ...     game.move(piece, move)
+        >>> ai.negamax(game)
+        >>> ai.get_best_move()
+        (1, 0)
+
+        >>> from game.mnk import MNKGame
+        >>> game = MNKGame((4, 4), 4)
+        >>> ai.negamax(game, node_limit=2000)
+        >>> ai.completed_depth < ai._max_depth
+        True
+        >>> ai.get_best_move() is not None
+        True
+
+        Move ordering gets more cutoffs, so searches fewer nodes
+
+        >>> from ai.ordering import MoveOrdering
+        >>> ordered_ai = Ai(Piece.X, ordering=MoveOrdering())
+        >>> ordered_ai.negamax(BitboardTicTacToe())
+        >>> ai = Ai(Piece.X)
+        >>> ai.negamax(BitboardTicTacToe())
+        >>> ordered_ai._nodes < ai._nodes
+        True
+
+        So do null windows, finding the same move
+
+        >>> from game.chess import Chess, Player
+        >>> ai = Ai(Player.W, max_depth=2)
+        >>> ai.negamax(Chess())
+        >>> pvs_ai = Ai(Player.W, max_depth=2, pvs=True)
+        >>> pvs_ai.negamax(Chess())
+        >>> (pvs_ai.get_best_move() == ai.get_best_move(), pvs_ai.nodes < ai.nodes)
+        (True, True)
+
+        Positions searched ahead of time are answered from `ponder_cache`
+
+        >>> game = BitboardTicTacToe()
+        >>> game.move(Piece.X, (1, 1))
+        >>> ai = Ai(Piece.O)
+        >>> ai.negamax(game)
+        >>> ai.ponder_cache[game.hash_key()] = ai.search_state()
+        >>> ai.negamax(game)
+        >>> (ai.nodes, ai.get_best_move())
+        (0, (0, 0))
         """
-        self._best_moves = dict()
-        self._negamax_rec(game, 0, -1000, 1000, self._player)
+        self._nodes = 0
+        self._stop_requested = False
+        state = self._ponder_cache.pop(game.hash_key(), None)
+        if state is not None and (state.max_depth != self._max_depth or state.completed_depth is None):
+            state = None
+
+        if state is not None and state.finished:
+            self._restore(state)
+            self._principal_variation = self._follow_pv(game)
+            return
+
+        if state is not None:
+            # Same root, so the cached entries still hold
+            self._restore(state)
+        else:
+            self._best_moves = dict()
+            # Scores depend on the distance from the root,
+            # so entries can't be shared between searches
+            self._transpositions = dict()
+            self._hash_moves = dict()
+            self._pv_moves = dict()
+            self._previous_best = None
+            self._previous_value = None
+            self._completed_depth = None
+        self._finished = False
+
+        if self._ordering is not None:
+            self._ordering.new_search()
+
+        if time_limit is None and node_limit is None:
+            self._depth_limit = self._max_depth
+            self._next_check = float('inf')
+            self._search(game, 0, -1000, 1000, self._player)
+            self._completed_depth = self._max_depth
+            self._finished = True
+            self._principal_variation = self._follow_pv(game)
+            return
+
+        self._node_limit = node_limit
+        self._deadline = None if time_limit is None else time.perf_counter() + time_limit
+        self._next_check = min(BUDGET_CHECK_INTERVAL, node_limit or BUDGET_CHECK_INTERVAL)
+
+        first_depth = 0 if self._completed_depth is None else self._completed_depth + 1
+        for depth_limit in range(first_depth, self._max_depth + 1):
+            self._depth_limit = depth_limit
+            self._horizon_reached = False
+            best_moves = self._best_moves
+            self._best_moves = dict()
+
+            try:
+                value = self._aspiration_search(game)
+            except _SearchAborted as aborted:
+                for _ in range(aborted.depth):
+                    game.undo_move()
+
+                # Keep the last finished iteration's moves, if there was one
+                if self._completed_depth is not None:
+                    self._best_moves = best_moves
+                break
+
+            self._completed_depth = depth_limit
+            self._previous_best = self.get_best_move()
+            self._previous_value = value
+
+            # Nothing left past the horizon, so deeper searches can't change the result
+            if not self._horizon_reached or depth_limit == self._max_depth:
+                self._finished = True
+                break
+
+        self._principal_variation = self._follow_pv(game)
+
+    def _restore(self, state: SearchState):
+        """
+        Carry on from `state` as though it were this AI's last search
+        """
+        self._completed_depth = state.completed_depth
+        self._finished = state.finished
+        self._best_moves = dict(state.best_moves)
+        self._previous_best = self.get_best_move()
+        self._previous_value = state.previous_value
+        self._transpositions = state.transpositions
+        self._hash_moves = state.hash_moves
+        self._pv_moves = state.pv_moves
+
+    def search_state(self) -> SearchState:
+        """
+        What the last call to `negamax` found, for `ponder_cache`
+        """
+        return SearchState(
+            self._max_depth, self._completed_depth, self._finished, self._best_moves,
+            self._previous_value, self._transpositions, self._hash_moves, self._pv_moves
+        )
+
+    def spawn(self) -> 'Ai':
+        """
+        New AI with the same settings and nothing searched yet,
+        to search on another thread alongside this one
+        """
+        ordering = None if self._ordering is None else copy.deepcopy(self._ordering)
+        return Ai(self._player, self._max_depth, ordering, self._recursive, self._pvs)
+
+    def stop(self):
+        """
+        Abort the search running on another thread at its next budget check,
+        keeping its last finished iteration. Only searches with a budget
+        check it at all, and the next call to `negamax` starts afresh
+
+        >>> from game.mnk import MNKGame
+        >>> from game.tictactoe import Piece
+        >>> ai = Ai(Piece.X)
+        >>> ai.stop()
+        >>> ai.negamax(MNKGame((4, 4), 4), node_limit=2000)
+        >>> ai.nodes > BUDGET_CHECK_INTERVAL
+        True
+        """
+        self._stop_requested = True
+
+    def _aspiration_search(self, game: Game) -> float:
+        """
+        Value of the root, searched first in a window around the last
+        iteration's value when using `pvs`, and again with the full
+        window if the value lands outside it
+        """
+        if self._pvs and self._previous_value is not None:
+            alpha = self._previous_value - ASPIRATION_WINDOW
+            beta = self._previous_value + ASPIRATION_WINDOW
+            value = self._search(game, 0, alpha, beta, self._player)
+            if alpha < value < beta:
+                return value
+
+            # Root move values were only bounds, so they all need searching again
+            self._best_moves = dict()
+
+        return self._search(game, 0, -1000, 1000, self._player)
+
+    def _follow_pv(self, game: Game) -> list:
+        """
+        Best move, then the best replies recorded for each position
+        it leads to, for as long as their exact values are known
+        """
+        principal_variation = list()
+        move = self.get_best_move()
+        player = self._player
+        seen = set()
+
+        while move is not None and game.hash_key() not in seen:
+            seen.add(game.hash_key())
+            game.move(player, move, enqueue=True)
+            principal_variation.append(move)
+            player = game.other(player)
+            move = None if game.is_over() else self._pv_moves.get(game.hash_key())
+
+        for _ in principal_variation:
+            game.undo_move()
+
+        return principal_variation
+
+    def _check_budget(self, depth: int):
+        """
+        Abort the search at depth `depth` if its budget is spent
+        """
+        if self._stop_requested:
+            raise _SearchAborted(depth)
+
+        if self._node_limit is not None and self._nodes >= self._node_limit:
+            raise _SearchAborted(depth)
+
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            raise _SearchAborted(depth)
+
+        self._next_check = self._nodes + BUDGET_CHECK_INTERVAL
+        if self._node_limit is not None:
+            self._next_check = min(self._next_check, self._node_limit)
+
+    def _search(self, game: Game, depth: int, alpha: int, beta: int, player: Enum):
+        """
+        Negamax value of the node at depth `depth`, by whichever of
+        `_negamax_stack` or `_negamax_rec` this AI was made to use
+
+        Both search the same tree in the same order, so agree on everything
+
+        >>> from game.tictactoe import Piece
+        >>> from game.mnk import MNKGame
+        >>> from ai.ordering import MoveOrdering
+        >>> for (ordering, pvs) in [(lambda: None, False), (MoveOrdering, False), (MoveOrdering, True)]:
+        ...     searches = list()
+        ...     for recursive in (False, True):
+        ...         ai = Ai(Piece.X, ordering=ordering(), recursive=recursive, pvs=pvs)
+        ...         ai.negamax(MNKGame((4, 4), 3), node_limit=5000)
+        ...         searches.append((ai._best_moves, ai.nodes, ai.completed_depth, len(ai._transpositions)))
+        ...     print(searches[0] == searches[1])
+        True
+        True
+        True
+
+        Only the explicit stack goes deeper than the recursion limit allows
+
+        >>> import sys, itertools
+        >>> class Corridor(MNKGame):
+        ...     # Only the first empty square can be played, so there is one line of play
+        ...     def allowed_moves(self, player):
+        ...         yield from itertools.islice(super().allowed_moves(player), 1)
+        >>> length = sys.getrecursionlimit() + 10
+        >>> ai = Ai(Piece.X, max_depth=length, recursive=False)
+        >>> ai.negamax(Corridor((1, length), length + 1))
+        >>> (ai.get_best_move(), ai.nodes)
+        ((0, 0), 1011)
+        >>> Ai(Piece.X, max_depth=length, recursive=True).negamax(Corridor((1, length), length + 1))  # doctest: +IGNORE_EXCEPTION_DETAIL
+        Traceback (most recent call last):
+        ...
+        RecursionError: maximum recursion depth exceeded
+        """
+        if self._recursive:
+            return self._negamax_rec(game, depth, alpha, beta, player)
+
+        return self._negamax_stack(game, depth, alpha, beta, player)
+
+    def _negamax_stack(self, game: Game, depth: int, alpha: int, beta: int, player: Enum):
+        """
+        Negamax algorithm at depth of `depth`, visiting nodes in the same order
+        as `_negamax_rec`, with each ply's state saved in a frame of its own
+        """
+        root_depth = depth
+        frames = self._frames
+        ordering = self._ordering
+        transpositions = self._transpositions
+        depth_limit = self._depth_limit
+        ai_player = self._player
+        # The players take turns, so who moves next and the sign turning `score`
+        # into the value for whoever is to move are picked rather than worked out
+        opponent = game.other(ai_player)
+        (ai_sign, opponent_sign) = (ai_player.value * ai_player.value, opponent.value * ai_player.value)
+        pvs = self._pvs
+        instrumented = self._instrumented
+        symmetric_values = dict()
+        # The whole search runs in this one call, so look everything up just once
+        (is_over, can_win, make_move, undo_move, canonical_key) = (
+            game.is_over, game.can_win, game.move, game.undo_move, game.canonical_key
+        )
+        nodes = self._nodes
+        next_check = self._next_check
+        # Whether the node about to be entered is over, found by its parent when it has one
+        over = is_over()
+
+        while True:
+            # Enter the node at `depth`, finding its value straight away if possible
+            if instrumented:
+                self._enter_node(game, depth, alpha, beta, player)
+
+            nodes += 1
+            if nodes >= next_check:
+                self._nodes = nodes
+                self._check_budget(depth)
+                next_check = self._next_check
+
+            result = None
+            if over:
+                # `score` is for this AI's player, so flip it for the opponent
+                result = (ai_sign if player is ai_player else opponent_sign) * game.score(ai_player, depth + 1)
+            elif depth > depth_limit:
+                # Unknown outcome past the horizon, so fall back on the game's own estimate
+                self._horizon_reached = True
+                result = (ai_sign if player is ai_player else opponent_sign) * game.evaluate(ai_player)
+            else:
+                alpha_orig = alpha
+                # Rotations and reflections of a position share one entry
+                key = canonical_key()
+                remaining = depth_limit - depth
+
+                if depth > 0:
+                    entry = transpositions.get(key)
+                    if entry is not None and entry[1] >= remaining:
+                        (entry_value, _, bound) = entry
+                        if bound == Bound.EXACT:
+                            result = entry_value
+                        elif bound == Bound.LOWER:
+                            alpha = max(alpha, entry_value)
+                        else:
+                            beta = min(beta, entry_value)
+
+                        if alpha >= beta:
+                            result = entry_value
+
+                        if result is not None:
+                            self._transposition_cutoff = True
+
+                if result is None:
+                    value = -1000
+                    best_move = None
+                    moves = game.allowed_moves(player)
+
+                    if ordering is not None:
+                        # Best move last time this exact position was searched
+                        hash_move = self._hash_moves.get(game.hash_key())
+                        moves = ordering.order(game, player, moves, depth, hash_move)
+
+                    if depth == 0 and self._previous_best is not None:
+                        # Previous iteration's best move is most likely to be best again
+                        moves = sorted(moves, key=lambda move: move != self._previous_best)
+
+                    moves = iter(moves)
+
+            # Fold values into the nodes on the stack until a child needs entering
+            while True:
+                if result is None:
+                    move = next(moves, _NO_MOVE)
+                    if move is not _NO_MOVE:
+                        make_move(player, move, enqueue=True)
+                        next_player = opponent if player is ai_player else ai_player
+
+                        if depth == 0 and canonical_key() in symmetric_values:
+                            # Root move is a mirror image of one already searched
+                            negamax_value = symmetric_values[canonical_key()]
+                        elif not (over := is_over()) and can_win(next_player):
+                            negamax_value = -1000
+                        else:
+                            ply = depth - root_depth
+                            if ply == len(frames):
+                                frames.extend([None] * ply)
+                            # Only worth a full search if it beats the best move so far
+                            probing = pvs and best_move is not None
+                            frames[ply] = (moves, alpha, beta, value, best_move, move, player, alpha_orig, key, remaining, probing)
+
+                            if probing:
+                                (depth, alpha, beta, player) = (depth + 1, -alpha - NULL_WINDOW, -alpha, next_player)
+                            else:
+                                (depth, alpha, beta, player) = (depth + 1, -beta, -alpha, next_player)
+                            break
+                else:
+                    if instrumented:
+                        self._exit_node(game, depth, result)
+
+                    if depth == root_depth:
+                        self._nodes = nodes
+                        return result
+
+                    depth -= 1
+                    frame = frames[depth - root_depth]
+                    (moves, alpha, beta, value, best_move, move, player, alpha_orig, key, remaining, probing) = frame
+                    negamax_value = -result
+                    result = None
+
+                    if probing and alpha < negamax_value < beta:
+                        # Beat the best move after all, so search it again with the full window
+                        frames[depth - root_depth] = frame[:-1] + (False,)
+                        player = opponent if player is ai_player else ai_player
+                        (depth, alpha, beta) = (depth + 1, -beta, -alpha)
+                        over = is_over()
+                        break
+
+                if move is _NO_MOVE:
+                    finished = True
+                else:
+                    if depth == 0:
+                        symmetric_values[canonical_key()] = negamax_value
+
+                    if negamax_value > value:
+                        value = negamax_value
+                        best_move = move
+                    undo_move()
+
+                    if depth == 0:
+                        self._best_moves[move] = value
+
+                    alpha = max(alpha, negamax_value)
+                    finished = alpha >= beta
+
+                    if finished:
+                        value = alpha
+                        if ordering is not None:
+                            ordering.cutoff(player, move, depth, remaining)
+
+                if finished:
+                    if ordering is not None and best_move is not None:
+                        self._hash_moves[game.hash_key()] = best_move
+
+                    if value <= alpha_orig:
+                        bound = Bound.UPPER
+                    elif value >= beta:
+                        bound = Bound.LOWER
+                    else:
+                        bound = Bound.EXACT
+                        if best_move is not None:
+                            self._pv_moves[game.hash_key()] = best_move
+                    transpositions[key] = (value, remaining, bound)
+
+                    result = value
 
     def _negamax_rec(self, game: Game, depth: int, alpha: int, beta: int, player: Enum):
         """
         Recursive Negamax algorithm at depth of `depth`
         """
-        if depth > 10 or game.is_over():
-            return player.value * game.score(self._player, depth + 1)
+        self._nodes += 1
+        if self._nodes >= self._next_check:
+            self._check_budget(depth)
+
+        if game.is_over():
+            # `score` is for this AI's player, so flip it for the opponent
+            return player.value * self._player.value * game.score(self._player, depth + 1)
+
+        if depth > self._depth_limit:
+            # Unknown outcome past the horizon, so fall back on the game's own estimate
+            self._horizon_reached = True
+            return player.value * self._player.value * game.evaluate(self._player)
+
+        alpha_orig = alpha
+        # Rotations and reflections of a position share one entry
+        key = game.canonical_key()
+        remaining = self._depth_limit - depth
+
+        if depth > 0:
+            entry = self._transpositions.get(key)
+            if entry is not None and entry[1] >= remaining:
+                (entry_value, _, bound) = entry
+                if bound == Bound.EXACT:
+                    self._transposition_cutoff = True
+                    return entry_value
+                elif bound == Bound.LOWER:
+                    alpha = max(alpha, entry_value)
+                else:
+                    beta = min(beta, entry_value)
+
+                if alpha >= beta:
+                    self._transposition_cutoff = True
+                    return entry_value
 
         value = -1000
+        best_move = None
+        symmetric_values = dict()
+        moves = game.allowed_moves(player)
 
-        for move in game.allowed_moves(player):
+        if self._ordering is not None:
+            # Best move last time this exact position was searched
+            hash_move = self._hash_moves.get(game.hash_key())
+            moves = self._ordering.order(game, player, moves, depth, hash_move)
+
+        if depth == 0 and self._previous_best is not None:
+            # Previous iteration's best move is most likely to be best again
+            moves = sorted(moves, key=lambda move: move != self._previous_best)
+
+        for move in moves:
             game.move(player, move, enqueue=True)
             next_player = game.other(player)
 
-            if game.can_win(next_player):
+            if depth == 0 and game.canonical_key() in symmetric_values:
+                # Root move is a mirror image of one already searched
+                negamax_value = symmetric_values[game.canonical_key()]
+            elif not game.is_over() and game.can_win(next_player):
                 negamax_value = -1000
+            elif self._pvs and best_move is not None:
+                # Only worth a full search if it beats the best move so far
+                negamax_value = -self._negamax_rec(game, depth + 1, -alpha - NULL_WINDOW, -alpha, next_player)
+                if alpha < negamax_value < beta:
+                    negamax_value = -self._negamax_rec(game, depth + 1, -beta, -alpha, next_player)
             else:
                 negamax_value = -self._negamax_rec(game, depth + 1, -beta, -alpha, next_player)
+
+            if depth == 0:
+                symmetric_values[game.canonical_key()] = negamax_value
         
-            value = max(value, negamax_value)
+            if negamax_value > value:
+                value = negamax_value
+                best_move = move
             game.undo_move()
 
             if depth == 0:
@@ -49,7 +646,23 @@ class Ai(object):
             alpha = max(alpha, negamax_value)
             
             if alpha >= beta:
-                return alpha
+                value = alpha
+                if self._ordering is not None:
+                    self._ordering.cutoff(player, move, depth, remaining)
+                break
+
+        if self._ordering is not None and best_move is not None:
+            self._hash_moves[game.hash_key()] = best_move
+
+        if value <= alpha_orig:
+            bound = Bound.UPPER
+        elif value >= beta:
+            bound = Bound.LOWER
+        else:
+            bound = Bound.EXACT
+            if best_move is not None:
+                self._pv_moves[game.hash_key()] = best_move
+        self._transpositions[key] = (value, remaining, bound)
 
         return value
 
@@ -70,10 +683,50 @@ class Ai(object):
         
         return max(self._best_moves, key=self._best_moves.get)
 
+    def get_principal_variation(self) -> list:
+        """
+        Moves both players are expected to play from the position last
+        searched, starting with the best move, for as far as the last
+        call to `negamax` worked out their exact values
+
+        >>> from game.tictactoe import Piece
+        >>> from game.bitboard import BitboardTicTacToe
+        >>> game = BitboardTicTacToe()
+        >>> for (piece, move) in [(Piece.X, (0, 0)), (Piece.O, (1, 1)), (Piece.X, (0, 1))]:
+        ...     game.move(piece, move)
+        >>> ai = Ai(Piece.O, pvs=True)
+        >>> ai.negamax(game, node_limit=10000)
+        >>> ai.get_principal_variation()[:2]
+        [(0, 2), (2, 0)]
+        """
+        return list(self._principal_variation)
+
     @property
     def player(self):
         return self._player
 
+    @property
+    def ponder_cache(self) -> dict:
+        """
+        `SearchState` by `hash_key` of positions searched ahead of time,
+        each used (and removed) by the next search of its position
+        """
+        return self._ponder_cache
+
+    @property
+    def completed_depth(self):
+        """
+        Depth limit of the deepest search that finished in the last call to `negamax`
+        """
+        return self._completed_depth
+
+    @property
+    def nodes(self):
+        """
+        Number of nodes visited by the last call to `negamax`
+        """
+        return self._nodes
+
 
 if __name__ == '__main__':
     import doctest
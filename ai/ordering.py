@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+from enum import Enum
+
+from game.game_abc import Game
+
+
+class MoveOrdering(object):
+    """
+    Orders moves so that alpha-beta pruning cuts off early: the hash
+    move first, then this ply's killer moves, then moves by history
+    score and finally by the game's static `move_hint`
+    """
+    def __init__(self, killers_per_ply=2):
+        self._killers_per_ply = killers_per_ply
+        self._killers = dict()
+        self._history = dict()
+
+    def new_search(self):
+        """
+        Forget killer moves (plies are relative to the root) and
+        age the history table so recent searches count the most
+        """
+        self._killers = dict()
+        self._history = {key: score // 2 for (key, score) in self._history.items() if score > 1}
+
+    def order(self, game: Game, player: Enum, moves, depth: int, hash_move=None) -> list:
+        """
+        `moves` of `player` at search depth `depth`, most promising first
+
+        >>> from game.tictactoe import Piece
+        >>> from game.bitboard import BitboardTicTacToe
+        >>> game = BitboardTicTacToe()
+        >>> ordering = MoveOrdering()
+        >>> ordering.order(game, Piece.X, game.allowed_moves(Piece.X), 0)[:5]
+        [(1, 1), (0, 0), (0, 2), (2, 0), (2, 2)]
+        >>> ordering.cutoff(Piece.X, (2, 1), 1, 3)
+        >>> ordering.order(game, Piece.X, game.allowed_moves(Piece.X), 1)[:2]
+        [(2, 1), (1, 1)]
+        >>> ordering.order(game, Piece.X, game.allowed_moves(Piece.X), 1, hash_move=(0, 1))[:3]
+        [(0, 1), (2, 1), (1, 1)]
+        """
+        killers = self._killers.get(depth, ())
+        history = self._history
+
+        def priority(move):
+            return (
+                move == hash_move,
+                move in killers,
+                history.get((player, move), 0),
+                game.move_hint(player, move)
+            )
+
+        return sorted(moves, key=priority, reverse=True)
+
+    def cutoff(self, player: Enum, move: object, depth: int, remaining: int):
+        """
+        Record that `move` of `player` caused a beta cutoff at search
+        depth `depth` with `remaining` plies left to search
+        """
+        killers = self._killers.setdefault(depth, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[self._killers_per_ply:]
+
+        key = (player, move)
+        self._history[key] = self._history.get(key, 0) + remaining * remaining
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+
+import time
+import multiprocessing
+from enum import Enum
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from ai.negamax import Ai, BUDGET_CHECK_INTERVAL, _SearchAborted
+from game.game_abc import Game
+
+
+# Best root value found so far by any worker, set up by `_init_worker`
+_shared_alpha = None
+
+
+def _init_worker(shared_alpha):
+    global _shared_alpha
+    _shared_alpha = shared_alpha
+
+
+def _search_root_move(ai: Ai, game: Game, move: object, deadline=None, node_limit=None):
+    """
+    Search root `move` in a worker process, narrowing the window
+    by the best value any worker has found so far
+
+    Given a `deadline` (seconds since the epoch, as processes don't
+    share `perf_counter`) or `node_limit`, deepens one ply at a time
+    and keeps the value of the deepest search that finished in time
+
+    Returns (`move`, value or None if no search finished, alpha the
+    search started with, depth limit searched to, whether deeper
+    searches can't change the value, nodes, principal variation)
+    """
+    player = ai.player
+    game.move(player, move, enqueue=True)
+    next_player = game.other(player)
+
+    alpha = _shared_alpha.value
+    (value, completed_depth, finished) = (None, None, False)
+
+    if not game.is_over() and game.can_win(next_player):
+        (value, completed_depth, finished) = (-1000, ai._max_depth, True)
+    elif deadline is None and node_limit is None:
+        value = -ai._search(game, 1, -1000, -alpha, next_player)
+        (completed_depth, finished) = (ai._max_depth, True)
+    else:
+        ai._node_limit = node_limit
+        ai._deadline = None if deadline is None else time.perf_counter() + deadline - time.time()
+        ai._next_check = min(BUDGET_CHECK_INTERVAL, node_limit or BUDGET_CHECK_INTERVAL)
+
+        for depth_limit in range(1, ai._max_depth + 1):
+            ai._depth_limit = depth_limit
+            ai._horizon_reached = False
+
+            try:
+                value = -ai._search(game, 1, -1000, -alpha, next_player)
+            except _SearchAborted as aborted:
+                # The root move itself stays on the board
+                for _ in range(aborted.depth - 1):
+                    game.undo_move()
+                break
+
+            completed_depth = depth_limit
+            if not ai._horizon_reached:
+                finished = True
+                break
+
+        # Only a finished iteration's value counts
+        if completed_depth is None:
+            value = None
+
+    if value is not None:
+        with _shared_alpha.get_lock():
+            if value > _shared_alpha.value:
+                _shared_alpha.value = value
+
+    game.undo_move()
+    ai._best_moves = {move: value}
+    principal_variation = ai._follow_pv(game) if value is not None else [move]
+
+    return (move, value, alpha, completed_depth, finished, ai.nodes, principal_variation)
+
+
+class ParallelAi(Ai):
+    """
+    AI which uses the Negamax algorithm, searching each
+    root move in parallel across a pool of processes
+
+    Workers search the way this AI was made to, with
+    `recursive` and `pvs` passed on to each of them
+    """
+    def __init__(
+        self, player: Enum, max_depth=10, ordering=None, recursive=False, pvs=False, max_workers=None, mp_context=None
+    ):
+        super().__init__(player, max_depth, ordering, recursive, pvs)
+        self._max_workers = max_workers
+        self._mp_context = mp_context
+        self._shared_alpha = None
+        self._executor = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        """
+        Process pool for root moves, started on first use
+        """
+        if self._executor is None:
+            context = self._mp_context or multiprocessing.get_context()
+            self._shared_alpha = context.Value('d', -1000)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._max_workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self._shared_alpha,)
+            )
+
+        return self._executor
+
+    def negamax(self, game: Game, time_limit=None, node_limit=None):
+        """
+        Use Negamax algorithm to find best move in given game
+        state, with one task per distinct root move
+
+        Given a `time_limit` (seconds) or `node_limit`, each task deepens
+        its root move one ply at a time until the time runs out or it has
+        searched its share of the nodes, keeping its deepest finished search
+
+        >>> from game.tictactoe import Piece
+        >>> from game.bitboard import BitboardTicTacToe
+        >>> game = BitboardTicTacToe()
+        >>> for (piece, move) in [(Piece.X, (0, 0)), (Piece.O, (1, 1)), (Piece.X, (2, 2))]:
+        ...     game.move(piece, move)
+        >>> with ParallelAi(Piece.O, max_workers=2) as ai:
+        ...     ai.negamax(game)
+        >>> ai.get_best_move() in [(0, 1), (1, 0), (1, 2), (2, 1)]
+        True
+        >>> len(ai._best_moves)
+        6
+        >>> (ai.completed_depth, ai.get_principal_variation()[0] == ai.get_best_move())
+        (10, True)
+
+        >>> from game.mnk import MNKGame
+        >>> with ParallelAi(Piece.X, max_workers=2) as ai:
+        ...     ai.negamax(MNKGame((4, 4), 4), node_limit=4000)
+        >>> (0 < ai.nodes <= 4000, ai.completed_depth < ai._max_depth)
+        (True, True)
+        >>> ai.get_principal_variation()[0] == ai.get_best_move()
+        True
+
+        >>> with ParallelAi(Piece.O, recursive=True, pvs=True, max_workers=2) as ai:
+        ...     ai.negamax(game)
+        >>> ai.get_best_move() in [(0, 1), (1, 0), (1, 2), (2, 1)]
+        True
+        """
+        self._best_moves = dict()
+        executor = self._pool()
+        self._shared_alpha.value = -1000
+
+        # Searched root moves by the canonical key of the position they
+        # lead to, and the moves that are mirror images of them
+        searched = dict()
+        symmetric = list()
+
+        for move in game.allowed_moves(self._player):
+            game.move(self._player, move, enqueue=True)
+            key = game.canonical_key()
+            game.undo_move()
+
+            if key in searched:
+                symmetric.append((move, searched[key]))
+            else:
+                searched[key] = move
+
+        # Each task gets an equal share of the nodes
+        deadline = None if time_limit is None else time.time() + time_limit
+        move_node_limit = None if node_limit is None else max(node_limit // max(len(searched), 1), 1)
+
+        # Fresh AI per task so workers never share search state
+        worker_ai = self.spawn()
+        futures = [
+            executor.submit(_search_root_move, worker_ai, game, move, deadline, move_node_limit)
+            for move in searched.values()
+        ]
+        results = dict()
+        lines = dict()
+        depths = list()
+        self._nodes = 0
+        self._finished = True
+
+        for future in as_completed(futures):
+            (move, value, alpha, completed_depth, finished, nodes, principal_variation) = future.result()
+            self._nodes += nodes
+            self._finished = self._finished and finished
+            depths.append(completed_depth)
+            lines[move] = principal_variation
+            if value is not None:
+                results[move] = (value, value > alpha or alpha <= -1000)
+
+        for (move, original) in symmetric:
+            lines[move] = [move]
+            if original in results:
+                results[move] = results[original]
+
+        # Values that failed low are only upper bounds, so list exact
+        # values first for `get_best_move` to prefer on ties
+        for exact in (True, False):
+            for move in game.allowed_moves(self._player):
+                if move in results and results[move][1] == exact:
+                    self._best_moves[move] = results[move][0]
+
+        # Every root move was searched at least this deep
+        self._completed_depth = None if None in depths or len(depths) == 0 else min(depths)
+        self._principal_variation = lines.get(self.get_best_move(), list())
+
+    def close(self):
+        """
+        Shut down the process pool
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+
+import threading
+
+from ai.negamax import Ai
+from game.game_abc import Game
+
+
+# Nodes searched for each pondered reply
+PONDER_NODE_LIMIT = 100000
+# Replies pondered when there are more than `ALL_REPLIES` to choose from
+LIKELY_REPLIES = 3
+# Boards with at most this many replies have every reply pondered
+ALL_REPLIES = 16
+# Seconds between asking the pondering search to stop
+STOP_INTERVAL = 0.01
+
+
+class Ponderer(object):
+    """
+    Searches the opponent's replies on a background thread while they
+    think, leaving what it finds in `ai.ponder_cache` so that `ai.negamax`
+    answers at once if the reply played was searched through, or carries
+    on from there if it was only partly searched
+
+    Replies are searched most likely first: the reply `ai` expected in its
+    last principal variation, then the rest by the game's `move_hint`.
+    With more than `all_replies` to choose from, only `likely_replies`
+    of them are searched
+
+    >>> from game.tictactoe import Piece
+    >>> from game.bitboard import BitboardTicTacToe
+    >>> ai = Ai(Piece.O)
+    >>> game = BitboardTicTacToe()
+    >>> ponderer = Ponderer(ai)
+    >>> ponderer.start(game)
+    >>> ponderer.wait()
+    >>> len(ai.ponder_cache)
+    9
+    >>> game.move(Piece.X, (1, 1))
+    >>> ponderer.stop()
+    >>> ai.negamax(game)
+    >>> (ai.nodes, ai.get_best_move() in [(0, 0), (0, 2), (2, 0), (2, 2)])
+    (0, True)
+
+    Replies only partly searched are searched deeper from where they stopped
+
+    >>> from game.mnk import MNKGame
+    >>> game = MNKGame((4, 4), 4)
+    >>> game.move(Piece.X, (1, 1), enqueue=True)
+    >>> ai = Ai(Piece.O)
+    >>> ai.negamax(game, node_limit=3000)
+    >>> fresh_depth = ai.completed_depth
+    >>> game.undo_move()
+    >>> ponderer = Ponderer(ai, node_limit=3000)
+    >>> ponderer.start(game)
+    >>> ponderer.wait()
+    >>> game.move(Piece.X, (1, 1))
+    >>> ai.negamax(game, node_limit=3000)
+    >>> ai.completed_depth > fresh_depth
+    True
+    """
+    def __init__(self, ai: Ai, node_limit=PONDER_NODE_LIMIT, likely_replies=LIKELY_REPLIES, all_replies=ALL_REPLIES):
+        self._ai = ai
+        self._node_limit = node_limit
+        self._likely_replies = likely_replies
+        self._all_replies = all_replies
+        self._thread = None
+        self._worker = None
+        self._stopping = None
+
+    def start(self, game: Game):
+        """
+        Start pondering the replies to `game`, which has the opponent
+        of `ai` to move. `game` itself is not touched, so it can be
+        played on while pondering goes on
+        """
+        self.stop()
+        self._ai.ponder_cache.clear()
+
+        # The search state of `ai` belongs to its own thread
+        self._worker = self._ai.spawn()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(
+            target=self._ponder, args=(game.clone(), self.replies(game), self._worker, self._stopping), daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop pondering, waiting for the reply being searched
+        to store whatever its search finished so far
+        """
+        if self._thread is None:
+            return
+
+        self._stopping.set()
+        # A stop landing just before the next reply's search starts
+        # is cleared by it, so keep asking until the thread is done
+        while self._thread.is_alive():
+            self._worker.stop()
+            self._thread.join(STOP_INTERVAL)
+        self._thread = None
+
+    def wait(self):
+        """
+        Wait until every reply has been pondered
+        """
+        if self._thread is not None:
+            self._thread.join()
+
+    def replies(self, game: Game) -> list:
+        """
+        Replies of the opponent to ponder in `game`, most likely first
+
+        >>> from game.tictactoe import Piece
+        >>> from game.bitboard import BitboardTicTacToe
+        >>> Ponderer(Ai(Piece.O), all_replies=4).replies(BitboardTicTacToe())
+        [(1, 1), (0, 0), (0, 2)]
+        """
+        opponent = game.other(self._ai.player)
+        moves = sorted(game.allowed_moves(opponent), key=lambda move: game.move_hint(opponent, move), reverse=True)
+
+        principal_variation = self._ai.get_principal_variation()
+        if len(principal_variation) > 1 and principal_variation[1] in moves:
+            moves.remove(principal_variation[1])
+            moves.insert(0, principal_variation[1])
+
+        if len(moves) > self._all_replies:
+            return moves[:self._likely_replies]
+
+        return moves
+
+    def _ponder(self, game: Game, replies: list, worker: Ai, stopping: threading.Event):
+        """
+        Search each of `replies` in turn on the pondering thread
+        """
+        opponent = game.other(self._ai.player)
+        cache = self._ai.ponder_cache
+
+        for reply in replies:
+            if stopping.is_set():
+                break
+
+            game.move(opponent, reply, enqueue=True)
+            if not game.is_over():
+                worker.negamax(game, node_limit=self._node_limit)
+                state = worker.search_state()
+                if state.completed_depth is not None:
+                    cache[game.hash_key()] = state
+            game.undo_move()
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
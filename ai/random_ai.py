@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+import random
+from enum import Enum
+
+from game.game_abc import Game
+
+
+class RandomAi(object):
+    """
+    AI which picks uniformly among the allowed moves,
+    useful as a baseline opponent
+    """
+    def __init__(self, player: Enum, seed=None):
+        self._player = player
+        self._random = random.Random(seed)
+        self._best_move = None
+
+    def negamax(self, game: Game, time_limit=None, node_limit=None):
+        """
+        Pick a random allowed move in given game state, at once
+        whatever the budget
+
+        >>> from game.tictactoe import Piece
+        >>> from game.bitboard import BitboardTicTacToe
+        >>> ai = RandomAi(Piece.X, seed=1)
+        >>> ai.negamax(BitboardTicTacToe())
+        >>> ai.get_best_move() in list(BitboardTicTacToe().allowed_moves(Piece.X))
+        True
+        """
+        moves = list(game.allowed_moves(self._player))
+        self._best_move = self._random.choice(moves) if len(moves) > 0 else None
+
+    def get_best_move(self):
+        """
+        Move picked by the last call to `negamax`
+        """
+        return self._best_move
+
+    @property
+    def player(self):
+        return self._player
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
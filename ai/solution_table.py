@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+
+import os
+import mmap
+import struct
+from enum import Enum
+
+from ai.negamax import Ai
+from game.game_abc import Game
+from game.tictactoe import Piece
+
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'tictactoe.solution')
+
+MAGIC = b'TTTS'
+HEADER = struct.Struct('<4sI')
+# Value for the side to move, best move as square index (i * 3 + j)
+RECORD = struct.Struct('<bB')
+
+NO_MOVE = 0xFF
+UNKNOWN = -128
+# Value of a lost position, shrinking by one for every ply
+# until the loss, so quicker wins score higher
+LOSS = -10
+
+# Both possible players to move for every base-3 board index
+RECORD_COUNT = 3 ** 9 * 2
+
+WIN_LINES = [
+    [0, 1, 2], [3, 4, 5], [6, 7, 8],
+    [0, 3, 6], [1, 4, 7], [2, 5, 8],
+    [0, 4, 8], [2, 4, 6]
+]
+
+
+def record_index(position_index: int, player: Enum) -> int:
+    """
+    Record index of `position_index` with `player` to move
+
+    >>> record_index(0, Piece.X)
+    0
+    >>> record_index(0, Piece.O)
+    1
+    """
+    return position_index * 2 + (player == Piece.O)
+
+
+def solve() -> dict:
+    """
+    Solve every position reachable from an empty board with either player
+    starting, mapping record index to (value, best square)
+
+    >>> table = solve()
+    >>> table[record_index(0, Piece.X)]
+    (0, 0)
+    >>> sum(1 for (value, _) in table.values() if value > 0) > 0
+    True
+    """
+    # Squares hold `Piece.value % 3` (empty 0, O 1, X 2) as in `TicTacToe.position_index`
+    table = dict()
+
+    def winner(board):
+        for line in WIN_LINES:
+            first = board[line[0]]
+            if first != 0 and first == board[line[1]] == board[line[2]]:
+                return first
+        return 0
+
+    def solve_rec(board, digit):
+        index = 0
+        for square in board:
+            index = index * 3 + square
+        key = index * 2 + (digit == 1)
+
+        if key in table:
+            return table[key][0]
+
+        if winner(board) != 0:
+            result = (LOSS, NO_MOVE)
+        elif 0 not in board:
+            result = (0, NO_MOVE)
+        else:
+            result = (UNKNOWN, NO_MOVE)
+            for square in range(9):
+                if board[square] != 0:
+                    continue
+
+                board[square] = digit
+                value = -solve_rec(board, 3 - digit)
+                board[square] = 0
+
+                value -= (value > 0) - (value < 0)
+                if value > result[0]:
+                    result = (value, square)
+
+        table[key] = result
+        return result[0]
+
+    for digit in (1, 2):
+        solve_rec([0] * 9, digit)
+
+    return table
+
+
+def generate(path=DEFAULT_PATH):
+    """
+    Write the solution of every reachable position to `path`,
+    one record per record index
+    """
+    table = solve()
+    empty = RECORD.pack(UNKNOWN, NO_MOVE)
+
+    with open(path + '.tmp', 'wb') as f:
+        f.write(HEADER.pack(MAGIC, RECORD_COUNT))
+        for index in range(RECORD_COUNT):
+            record = table.get(index)
+            f.write(empty if record is None else RECORD.pack(*record))
+
+    os.replace(path + '.tmp', path)
+
+
+class SolutionAi(object):
+    """
+    AI which looks up the best move in a precomputed solution
+    table, falling back to Negamax for games the table can't answer
+    (or for every game, if there is no table at `path`)
+
+    >>> import tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'tictactoe.solution')
+    >>> with open(path, 'wb') as f:
+    ...     _ = f.write(HEADER.pack(MAGIC, RECORD_COUNT) + bytes(RECORD.size))
+    >>> SolutionAi(Piece.X, path)  # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    ...
+    ValueError: .../tictactoe.solution is truncated, generate it again with `python3 -m ai.solution_table`
+    """
+    def __init__(self, player: Enum, path=DEFAULT_PATH, fallback=None):
+        self._player = player
+        self._fallback = fallback if fallback is not None else Ai(player)
+        self._best_move = None
+        self._table = None
+
+        try:
+            with open(path, 'rb') as f:
+                table = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return
+
+        # Some other file, so just search
+        if len(table) >= HEADER.size and HEADER.unpack_from(table) != (MAGIC, RECORD_COUNT):
+            table.close()
+            return
+
+        if len(table) < HEADER.size + RECORD_COUNT * RECORD.size:
+            table.close()
+            raise ValueError(f'{path} is truncated, generate it again with `python3 -m ai.solution_table`')
+
+        self._table = table
+
+    def negamax(self, game: Game, time_limit=None, node_limit=None):
+        """
+        Find best move in given game state, using the
+        solution table when it covers the position and
+        otherwise the fallback, within `time_limit` or `node_limit`
+
+        >>> import tempfile
+        >>> from game.bitboard import BitboardTicTacToe
+        >>> path = os.path.join(tempfile.mkdtemp(), 'tictactoe.solution')
+        >>> generate(path)
+        >>> ai = SolutionAi(Piece.O, path)
+        >>> game = BitboardTicTacToe()
+        >>> for (piece, move) in [(Piece.X, (0, 0)), (Piece.O, (1, 1)), (Piece.X, (0, 1))]:
+        ...     game.move(piece, move)
+        >>> ai.negamax(game)
+        >>> ai.get_best_move()
+        (0, 2)
+        >>> ai.value(game)
+        0
+        """
+        self._best_move = None
+        record = self._lookup(game)
+
+        if record is None:
+            self._fallback.negamax(game, time_limit=time_limit, node_limit=node_limit)
+            self._best_move = self._fallback.get_best_move()
+        elif record[1] != NO_MOVE:
+            self._best_move = divmod(record[1], 3)
+
+    def value(self, game: Game):
+        """
+        Solved value of `game` for this AI's player, or None if unknown
+        """
+        record = self._lookup(game)
+        return None if record is None else record[0]
+
+    def _lookup(self, game: Game):
+        """
+        Table record for `game` with this AI's player to move
+        """
+        if self._table is None or not hasattr(game, 'position_index'):
+            return None
+
+        offset = HEADER.size + RECORD.size * record_index(game.position_index(), self._player)
+        record = RECORD.unpack_from(self._table, offset)
+
+        return None if record[0] == UNKNOWN else record
+
+    def get_best_move(self):
+        """
+        Best move found by the last call to `negamax`
+        """
+        return self._best_move
+
+    @property
+    def player(self):
+        return self._player
+
+
+if __name__ == '__main__':
+    import sys
+
+    generate(*sys.argv[1:2])
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+
+import time
+from enum import Enum
+from collections import Counter
+
+from ai.negamax import Ai
+from game.game_abc import Game
+
+
+class SearchStats(object):
+    """
+    Counters collected over one call to `InstrumentedAi.negamax`
+    """
+    def __init__(self):
+        self.nodes_by_depth = list()
+        self.leaves = 0
+        # Nodes answered from the transposition table without searching any children
+        self.transposition_cutoffs = 0
+        self.cutoffs = 0
+        # Number of children searched before each cutoff happened
+        self.cutoff_positions = Counter()
+        self.can_win_prunes = 0
+        self.elapsed = 0.0
+
+    @property
+    def nodes(self) -> int:
+        return sum(self.nodes_by_depth)
+
+    @property
+    def effective_branching_factor(self) -> float:
+        """
+        Branching factor of a uniform tree with as many
+        nodes as were searched, as deep as the search went
+
+        >>> stats = SearchStats()
+        >>> stats.nodes_by_depth = [1, 3, 9]
+        >>> round(stats.effective_branching_factor, 3)
+        3.606
+        """
+        depth = len(self.nodes_by_depth) - 1
+        if depth < 1:
+            return 0.0
+
+        return self.nodes ** (1 / depth)
+
+    def as_dict(self) -> dict:
+        """
+        Plain dict of all counters, for exporting as metrics
+        """
+        return {
+            'nodes': self.nodes,
+            'nodes_by_depth': list(self.nodes_by_depth),
+            'leaves': self.leaves,
+            'transposition_cutoffs': self.transposition_cutoffs,
+            'cutoffs': self.cutoffs,
+            'cutoff_positions': dict(sorted(self.cutoff_positions.items())),
+            'can_win_prunes': self.can_win_prunes,
+            'elapsed': self.elapsed,
+            'effective_branching_factor': self.effective_branching_factor
+        }
+
+
+class _CountingGame(object):
+    """
+    Stands in for a game during an instrumented search, counting
+    the `can_win` checks that prune a move without searching it
+    """
+    def __init__(self, game: Game, stats: SearchStats):
+        self._game = game
+        self._stats = stats
+
+    def can_win(self, player: Enum):
+        if self._game.can_win(player):
+            self._stats.can_win_prunes += 1
+            return True
+        return False
+
+    def __getattr__(self, name: str):
+        return getattr(self._game, name)
+
+
+class InstrumentedAi(Ai):
+    """
+    Negamax AI which also records `SearchStats` for every search and
+    calls optional `on_enter(game, depth, alpha, beta, player)` and
+    `on_exit(game, depth, value)` callbacks around every node
+
+    Works with either search, `recursive` or not, with or without `pvs`,
+    and plain `Ai` has none of this bookkeeping, so searches that don't
+    need statistics pay nothing for it
+    """
+    _instrumented = True
+
+    def __init__(self, player: Enum, max_depth=10, ordering=None, on_enter=None, on_exit=None, recursive=False, pvs=False):
+        super().__init__(player, max_depth, ordering, recursive, pvs)
+        self._on_enter = on_enter
+        self._on_exit = on_exit
+        self._stats = SearchStats()
+        # Children entered so far and the beta searched with, for each node being searched
+        self._open_nodes = list()
+
+    def negamax(self, game: Game, time_limit=None, node_limit=None):
+        """
+        Use Negamax algorithm to find best move in given
+        game state, recording statistics along the way
+
+        >>> from game.tictactoe import Piece
+        >>> from game.bitboard import BitboardTicTacToe
+        >>> exits = list()
+        >>> ai = InstrumentedAi(Piece.O, on_exit=lambda game, depth, value: exits.append(depth))
+        >>> game = BitboardTicTacToe()
+        >>> game.move(Piece.X, (1, 1))
+        >>> ai.negamax(game)
+        >>> ai.get_best_move()
+        (0, 0)
+        >>> ai.stats.nodes == ai.nodes == len(exits)
+        True
+        >>> ai.stats.nodes_by_depth[0]
+        1
+        >>> ai.stats.cutoffs == sum(ai.stats.cutoff_positions.values())
+        True
+        >>> ai.stats.can_win_prunes > 0
+        True
+
+        Both searches visit the same nodes, so give the same statistics
+
+        >>> from game.mnk import MNKGame
+        >>> counts = list()
+        >>> for recursive in (True, False):
+        ...     ai = InstrumentedAi(Piece.X, recursive=recursive)
+        ...     ai.negamax(MNKGame((4, 4), 3), node_limit=3000)
+        ...     counts.append({name: value for (name, value) in ai.stats.as_dict().items() if name != 'elapsed'})
+        >>> counts[0] == counts[1]
+        True
+        >>> counts[0]['transposition_cutoffs'] > 0
+        True
+        """
+        self._stats = SearchStats()
+        self._open_nodes = list()
+
+        start_time = time.perf_counter()
+        try:
+            super().negamax(_CountingGame(game, self._stats), time_limit, node_limit)
+        finally:
+            self._stats.elapsed = time.perf_counter() - start_time
+
+    def _negamax_rec(self, game: Game, depth: int, alpha: int, beta: int, player: Enum):
+        """
+        Recursive Negamax algorithm at depth of `depth`, counting the node
+        """
+        self._enter_node(game, depth, alpha, beta, player)
+        value = super()._negamax_rec(game, depth, alpha, beta, player)
+        self._exit_node(game, depth, value)
+
+        return value
+
+    def _enter_node(self, game: Game, depth: int, alpha: int, beta: int, player: Enum):
+        """
+        Count the node at depth `depth` as it is entered
+        """
+        stats = self._stats
+        if depth == len(stats.nodes_by_depth):
+            stats.nodes_by_depth.append(0)
+        stats.nodes_by_depth[depth] += 1
+
+        if len(self._open_nodes) > 0:
+            self._open_nodes[-1][0] += 1
+        self._open_nodes.append([0, beta])
+        self._transposition_cutoff = False
+
+        if self._on_enter is not None:
+            self._on_enter(game._game, depth, alpha, beta, player)
+
+    def _exit_node(self, game: Game, depth: int, value: int):
+        """
+        Count how the node at depth `depth` ended as it returns `value`
+        """
+        stats = self._stats
+        (children, beta) = self._open_nodes.pop()
+
+        if children == 0:
+            # Nothing below it was entered, so `_transposition_cutoff` is still this node's own
+            if self._transposition_cutoff:
+                stats.transposition_cutoffs += 1
+            else:
+                stats.leaves += 1
+        elif value >= beta:
+            stats.cutoffs += 1
+            stats.cutoff_positions[children] += 1
+
+        if self._on_exit is not None:
+            self._on_exit(game._game, depth, value)
+
+    @property
+    def stats(self) -> SearchStats:
+        """
+        Statistics of the last call to `negamax`
+        """
+        return self._stats
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import time
+import timeit
+import argparse
+import tracemalloc
+
+from ai.negamax import Ai
+from game.bitboard import BitboardTicTacToe
+from game.mnk import MNKGame
+from game.tictactoe import TicTacToe, Piece
+
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'benchmark_baseline.json')
+
+# Reference positions as (name, game factory, moves played from the start with X first)
+POSITIONS = [
+    ('ttt-empty', TicTacToe, []),
+    ('ttt-edge', TicTacToe, [(0, 1)]),
+    ('ttt-midgame', TicTacToe, [(0, 0), (1, 1), (2, 2), (0, 2)]),
+    ('ttt-endgame', TicTacToe, [(0, 0), (1, 1), (0, 1), (0, 2), (2, 0), (1, 0)]),
+    ('bitboard-empty', BitboardTicTacToe, []),
+    ('bitboard-midgame', BitboardTicTacToe, [(0, 0), (1, 1), (2, 2), (0, 2)]),
+    ('mnk-4x4x3', lambda: MNKGame((4, 4), 3), [(1, 1), (2, 2)]),
+    ('mnk-4x4x4', lambda: MNKGame((4, 4), 4), [(1, 1), (2, 2), (1, 2), (2, 1)])
+]
+
+# Game methods timed on every reference position
+MICRO_BENCHMARKS = {
+    'is_winner': lambda game: game.is_winner(Piece.X),
+    'can_win': lambda game: game.can_win(Piece.O),
+    'is_over': lambda game: game.is_over(),
+    'score': lambda game: game.score(Piece.O, 3),
+    'allowed_moves': lambda game: list(game.allowed_moves(Piece.O))
+}
+
+# Ai depth limit for the end to end search benchmarks
+SEARCH_DEPTH = 6
+
+
+class Position(object):
+    """
+    Reference position set up on a fresh game, taken back on exit
+    """
+    def __init__(self, factory, moves: list):
+        self._factory = factory
+        self._moves = moves
+
+    def __enter__(self):
+        self.game = self._factory()
+        player = Piece.X
+
+        for move in self._moves:
+            self.game.move(player, move, enqueue=True)
+            player = player.other()
+
+        self.player = player
+        return self
+
+    def __exit__(self, *exc_info):
+        for _ in self._moves:
+            self.game.undo_move()
+
+
+def time_call(function, repeat: int) -> float:
+    """
+    Best seconds per call of `function` over `repeat` timing runs
+    """
+    timer = timeit.Timer(function)
+    (number, _) = timer.autorange()
+
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def bench_search(factory, moves: list, repeat: int) -> dict:
+    """
+    Wall time, nodes, nodes per second and peak memory
+    of a full `Ai.negamax` search of a reference position
+    """
+    with Position(factory, moves) as position:
+        ai = Ai(position.player, SEARCH_DEPTH)
+
+        seconds = float('inf')
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            ai.negamax(position.game)
+            seconds = min(seconds, time.perf_counter() - start_time)
+
+        tracemalloc.start()
+        ai.negamax(position.game)
+        (_, peak) = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        'seconds': seconds,
+        'nodes': ai.nodes,
+        'nodes_per_second': ai.nodes / seconds,
+        'peak_bytes': peak
+    }
+
+
+def run(repeat=5, name_filter='') -> dict:
+    """
+    Run every benchmark whose name contains `name_filter`
+    """
+    results = dict()
+
+    for (name, factory, moves) in POSITIONS:
+        search_name = f'search/{name}'
+        if name_filter in search_name:
+            results[search_name] = bench_search(factory, moves, repeat)
+
+        for (method, function) in MICRO_BENCHMARKS.items():
+            micro_name = f'{method}/{name}'
+            if name_filter not in micro_name:
+                continue
+
+            with Position(factory, moves) as position:
+                game = position.game
+                results[micro_name] = {'seconds': time_call(lambda: function(game), repeat)}
+
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Benchmarks in `results` that regressed against `baseline`: slower by
+    more than `tolerance` (a fraction), more nodes or more peak memory
+
+    >>> compare({'a': {'seconds': 1.2, 'nodes': 10}}, {'a': {'seconds': 1.0, 'nodes': 10}}, 0.1)
+    ['a: seconds 1 -> 1.2']
+    >>> compare({'a': {'seconds': 1.05, 'nodes': 10}}, {'a': {'seconds': 1.0, 'nodes': 10}}, 0.1)
+    []
+    >>> compare({'a': {'seconds': 1.0, 'nodes': 12}}, {'a': {'seconds': 1.0, 'nodes': 10}}, 0.1)
+    ['a: nodes 10 -> 12']
+    """
+    regressions = list()
+
+    for (name, result) in results.items():
+        if name not in baseline:
+            continue
+
+        before = baseline[name]
+        if result['seconds'] > before['seconds'] * (1 + tolerance):
+            regressions.append(f"{name}: seconds {before['seconds']:.3g} -> {result['seconds']:.3g}")
+
+        # Searches are deterministic, so any extra node is a regression
+        if 'nodes' in before and result['nodes'] > before['nodes']:
+            regressions.append(f"{name}: nodes {before['nodes']} -> {result['nodes']}")
+
+        if 'peak_bytes' in before and result['peak_bytes'] > before['peak_bytes'] * (1 + tolerance):
+            regressions.append(f"{name}: peak_bytes {before['peak_bytes']} -> {result['peak_bytes']}")
+
+    return regressions
+
+
+def print_results(results: dict, baseline: dict):
+    for (name, result) in results.items():
+        line = f"{name:32} {result['seconds'] * 1e6:12.2f}us"
+
+        if name in baseline:
+            line += f"  ({result['seconds'] / baseline[name]['seconds']:.2f}x baseline)"
+        if 'nodes' in result:
+            line += f"  {result['nodes']} nodes, {result['nodes_per_second']:.0f} nodes/s, {result['peak_bytes'] / 1024:.1f} KiB peak"
+
+        print(line)
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark search and game hot paths')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline file to compare against')
+    parser.add_argument('--save', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='allowed slowdown as a fraction (default: 0.1)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this')
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat, args.filter)
+
+    baseline = dict()
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print_results(results, baseline)
+
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+
+    return 1 if len(regressions) > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
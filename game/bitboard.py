@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+
+from enum import Enum
+from collections import deque
+from collections.abc import Generator
+
+from game_abc import Game
+from game.tictactoe import Piece, TicTacToe, SYMMETRIES
+
+
+# Square (i, j) is bit i * 3 + j
+MOVES = [(i, j) for i in range(3) for j in range(3)]
+FULL_BOARD = (1 << 9) - 1
+# Place value of each square in `position_index`
+POWERS = [3 ** (8 - bit) for bit in range(9)]
+WIN_MASKS = [
+    sum(1 << (i * 3 + j) for (i, j) in win_check)
+    for win_check in TicTacToe._win_checks
+]
+
+
+class BitboardTicTacToe(Game):
+    """
+    TicTacToe game with one integer bitboard per side
+    """
+    __slots__ = ('_sides', '_moves_queue', '_hashes', '_index')
+
+    _sym_zobrist = TicTacToe._sym_zobrist
+
+    def __init__(self):
+        # Indexed by `Piece.value`, so X is at -1 and O is at 1
+        self._sides = [0, 0, 0]
+        self._moves_queue = deque()
+        # Hash of the board under each of `SYMMETRIES`
+        self._hashes = [0] * len(SYMMETRIES)
+        self._index = 0
+
+    def allowed_moves(self, player: Piece) -> Generator:
+        """
+        Get all allowed moves for `player`
+
+        >>> game = BitboardTicTacToe()
+        >>> game.move(Piece.X, (0, 0))
+        >>> game.move(Piece.X, (1, 1))
+        >>> game.move(Piece.O, (2, 2))
+        >>> list(game.allowed_moves(None))
+        [(0, 1), (0, 2), (1, 0), (1, 2), (2, 0), (2, 1)]
+        """
+        empty = FULL_BOARD & ~(self._sides[1] | self._sides[-1])
+
+        while empty:
+            bit = empty & -empty
+            yield MOVES[bit.bit_length() - 1]
+            empty ^= bit
+
+    def move(self, player: Piece, move: tuple, enqueue=False):
+        """
+        Makes move for `player` at position `move_pos`
+        (assumes move at `move_pos` is allowed)
+
+        >>> game = BitboardTicTacToe()
+        >>> game.move(Piece.O, (0, 0), enqueue=True)
+        >>> game._sides[1]
+        1
+        >>> game._moves_queue.popleft()
+        (0, 0)
+        """
+        if enqueue:
+            self._moves_queue.appendleft(move)
+
+        bit = move[0] * 3 + move[1]
+        self._sides[player.value] |= 1 << bit
+        self._index += player.value % 3 * POWERS[bit]
+        self._update_hashes(move[0], move[1], player)
+
+    def can_win(self, player: Enum):
+        """
+        Checks if `player` is able to win in one move
+        with the current board state
+
+        >>> game = BitboardTicTacToe()
+        >>> game.move(Piece.X, (0, 0))
+        >>> game.move(Piece.X, (0, 1))
+        >>> game.can_win(Piece.X)
+        True
+        >>> game.can_win(Piece.O)
+        False
+        >>> game.move(Piece.O, (0, 2))
+        >>> game.can_win(Piece.X)
+        False
+        """
+        if player is None or player == Piece.S:
+            return False
+
+        side = self._sides[player.value]
+        empty = FULL_BOARD & ~(side | self._sides[-player.value])
+
+        if empty == 0:
+            return False
+
+        for mask in WIN_MASKS:
+            missing = mask & ~side
+            if missing == 0 or (missing & (missing - 1) == 0 and missing & empty):
+                return True
+
+        return False
+
+    def undo_move(self):
+        """
+        Takes back most recent move in queue
+
+        >>> game = BitboardTicTacToe()
+        >>> game.move(Piece.O, (0, 0), enqueue=True)
+        >>> game.undo_move()
+        >>> game._sides
+        [0, 0, 0]
+        >>> game.hash_key()
+        0
+        """
+        if len(self._moves_queue) == 0:
+            return
+
+        move = self._moves_queue.popleft()
+        bit = 1 << (move[0] * 3 + move[1])
+        player = Piece.O if self._sides[1] & bit else Piece.X
+
+        self._sides[player.value] &= ~bit
+        self._index -= player.value % 3 * POWERS[move[0] * 3 + move[1]]
+        self._update_hashes(move[0], move[1], player)
+
+    def _update_hashes(self, i: int, j: int, player: Piece):
+        """
+        Toggle `player` at (`i`, `j`) in every orientation's hash
+        """
+        hashes = self._hashes
+        for (s, value) in enumerate(self._sym_zobrist[(i, j, player)]):
+            hashes[s] ^= value
+
+    def hash_key(self) -> int:
+        """
+        Zobrist hash of the current board (matches `TicTacToe.hash_key`
+        for the same sequence of moves from an empty board)
+        """
+        return self._hashes[0]
+
+    def canonical_key(self) -> int:
+        """
+        Hash shared by all rotations and reflections of the current
+        board (matches `TicTacToe.canonical_key`)
+
+        >>> game = BitboardTicTacToe()
+        >>> game.move(Piece.X, (0, 1))
+        >>> edge = game.canonical_key()
+        >>> other = BitboardTicTacToe()
+        >>> other.move(Piece.X, (1, 2))
+        >>> other.canonical_key() == edge
+        True
+        """
+        return min(self._hashes)
+
+    def position_index(self) -> int:
+        """
+        Base-3 index of the board (matches `TicTacToe.position_index`)
+
+        >>> game = BitboardTicTacToe()
+        >>> game.move(Piece.X, (2, 1))
+        >>> game.move(Piece.O, (2, 2))
+        >>> game.position_index()
+        7
+        """
+        return self._index
+
+    def clone(self) -> 'BitboardTicTacToe':
+        """
+        Independent copy of the game
+
+        >>> game = BitboardTicTacToe()
+        >>> game.move(Piece.X, (1, 1), enqueue=True)
+        >>> copy = game.clone()
+        >>> copy.undo_move()
+        >>> (game.position_index(), copy.position_index())
+        (162, 0)
+        """
+        game = type(self).__new__(type(self))
+        game._sides = self._sides[:]
+        game._moves_queue = deque(self._moves_queue)
+        game._hashes = self._hashes[:]
+        game._index = self._index
+        return game
+
+    def move_hint(self, player: Piece, move: tuple) -> int:
+        """
+        Center is part of the most lines, then corners, then edges
+
+        >>> game = BitboardTicTacToe()
+        >>> [game.move_hint(Piece.X, move) for move in [(1, 1), (0, 0), (0, 1)]]
+        [2, 1, 0]
+        """
+        return TicTacToe._move_hints[move[0]][move[1]]
+
+    def other(self, player: Piece) -> Piece:
+        """
+        Inverse piece from `self`
+
+        >>> game = BitboardTicTacToe()
+        >>> str(game.other(Piece.X))
+        'O'
+        """
+        return player.other()
+
+    def score(self, player: Piece, depth: int) -> float:
+        """
+        Score of `piece` at search depth `depth` for current game state
+
+        >>> game = BitboardTicTacToe()
+        >>> for move in [(0, 0), (0, 1), (0, 2)]:
+        ...     game.move(Piece.X, move)
+        >>> game.score(Piece.X, 2)
+        500.0
+        >>> game.score(Piece.O, 2)
+        -500.0
+        """
+        if self.is_winner(player):
+            return 1000 / depth
+        elif self._sides[1] | self._sides[-1] == FULL_BOARD:
+            return 0
+        else:
+            return -1000 / depth
+
+    def is_over(self) -> bool:
+        """
+        Checks if game is at a terminal state
+
+        >>> game = BitboardTicTacToe()
+        >>> game.is_over()
+        False
+        >>> for move in [(0, 0), (1, 1), (2, 2)]:
+        ...     game.move(Piece.O, move)
+        >>> game.is_over()
+        True
+        """
+        if self._sides[1] | self._sides[-1] == FULL_BOARD:
+            return True
+
+        return self.is_winner(Piece.X) or self.is_winner(Piece.O)
+
+    def is_winner(self, player: Piece) -> bool:
+        """
+        Checks if `player` has won
+
+        >>> game = BitboardTicTacToe()
+        >>> game.is_winner(None)
+        False
+        >>> for move in [(0, 2), (1, 1), (2, 0)]:
+        ...     game.move(Piece.X, move)
+        >>> game.is_winner(Piece.X)
+        True
+        >>> game.is_winner(Piece.O)
+        False
+        """
+        if player is None or player == Piece.S:
+            return False
+
+        side = self._sides[player.value]
+
+        for mask in WIN_MASKS:
+            if side & mask == mask:
+                return True
+
+        return False
+
+    def __str__(self):
+        def piece_at(i, j):
+            bit = 1 << (i * 3 + j)
+            if self._sides[1] & bit:
+                return Piece.O
+            elif self._sides[-1] & bit:
+                return Piece.X
+            return Piece.S
+
+        sep = '-----------\n'
+        rows = (f' {piece_at(i, 0)} | {piece_at(i, 1)} | {piece_at(i, 2)}\n' for i in range(3))
+        return sep.join(rows)
+
+    __repr__ = __str__
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
 
 from enum import Enum
-from collections import deque
+from array import array
 from collections.abc import Generator
 
 from game_abc import Game
+from zobrist import zobrist_table
 
 
 class Player(Enum):
@@ -23,7 +24,7 @@ class Player(Enum):
         >>> str(Player.W.other())
         'B'
         """
-        return { 
+        return {
             Player.B: Player.W,
             Player.W: Player.B
         }[self]
@@ -57,188 +58,798 @@ class PieceType(Enum):
         }[self]
 
 
-class Piece(object):
+# Pieces on the board are `PieceType.value * Player.value`, so white's are
+# negative, black's positive and empty squares 0
+PAWN = PieceType.PAWN.value
+ROOK = PieceType.ROOK.value
+KNIGHT = PieceType.KNIGHT.value
+BISHOP = PieceType.BISHOP.value
+KING = PieceType.KING.value
+QUEEN = PieceType.QUEEN.value
+
+START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+FEN_PIECES = {str(piece_type).lower(): piece_type.value for piece_type in PieceType}
+
+# 0x88 board: square `rank * 16 + file` with rank 0 as white's back
+# rank, so `square & 0x88` is set exactly for squares off the board
+SQUARES = [square for square in range(128) if not square & 0x88]
+
+KNIGHT_STEPS = (33, 31, 18, 14, -14, -18, -31, -33)
+ROOK_STEPS = (16, -16, 1, -1)
+BISHOP_STEPS = (17, 15, -15, -17)
+KING_STEPS = ROOK_STEPS + BISHOP_STEPS
+
+
+def _targets(square: int, steps: tuple) -> tuple:
+    return tuple(square + step for step in steps if not (square + step) & 0x88)
+
+
+def _rays(square: int, steps: tuple) -> tuple:
+    rays = list()
+    for step in steps:
+        ray = list()
+        target = square + step
+        while not target & 0x88:
+            ray.append(target)
+            target += step
+        if ray:
+            rays.append(tuple(ray))
+
+    return tuple(rays)
+
+
+# Attack tables for every 0x88 index (empty off the board)
+KNIGHT_TARGETS = [_targets(square, KNIGHT_STEPS) if not square & 0x88 else () for square in range(128)]
+KING_TARGETS = [_targets(square, KING_STEPS) if not square & 0x88 else () for square in range(128)]
+ROOK_RAYS = [_rays(square, ROOK_STEPS) if not square & 0x88 else () for square in range(128)]
+BISHOP_RAYS = [_rays(square, BISHOP_STEPS) if not square & 0x88 else () for square in range(128)]
+# Squares a pawn of each player attacks `square` from, indexed by `Player.value`
+PAWN_ATTACKERS = [
+    None,
+    [_targets(square, (15, 17)) if not square & 0x88 else () for square in range(128)],
+    [_targets(square, (-15, -17)) if not square & 0x88 else () for square in range(128)]
+]
+
+# Castling right bits
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+CASTLING_LETTERS = {'K': WHITE_KINGSIDE, 'Q': WHITE_QUEENSIDE, 'k': BLACK_KINGSIDE, 'q': BLACK_QUEENSIDE}
+
+# Castling rights kept when a move touches each square
+CASTLING_MASKS = [15] * 128
+for (square, lost) in [(0x04, 3), (0x00, 2), (0x07, 1), (0x74, 12), (0x70, 8), (0x77, 4)]:
+    CASTLING_MASKS[square] = 15 & ~lost
+
+# For each player (indexed by `Player.value`): right, king from and to,
+# squares that must be empty and squares that must not be attacked
+CASTLES = [
+    None,
+    [
+        (BLACK_KINGSIDE, 0x74, 0x76, (0x75, 0x76), (0x74, 0x75, 0x76)),
+        (BLACK_QUEENSIDE, 0x74, 0x72, (0x73, 0x72, 0x71), (0x74, 0x73, 0x72))
+    ],
+    [
+        (WHITE_KINGSIDE, 0x04, 0x06, (0x05, 0x06), (0x04, 0x05, 0x06)),
+        (WHITE_QUEENSIDE, 0x04, 0x02, (0x03, 0x02, 0x01), (0x04, 0x03, 0x02))
+    ]
+]
+
+PROMOTIONS = (QUEEN, ROOK, BISHOP, KNIGHT)
+
+# Plies the undo stack has room for before it has to grow
+UNDO_CAPACITY = 256
+
+# Material in centipawns (kings are always on the board, so count for nothing)
+PIECE_VALUES = {PAWN: 100, KNIGHT: 320, BISHOP: 330, ROOK: 500, QUEEN: 900, KING: 0}
+
+# Bonus in centipawns for a piece of each type on each square, from
+# white's side of the board with rank 8 first (as in a FEN)
+PIECE_SQUARE_TABLES = {
+    PAWN: [
+        0, 0, 0, 0, 0, 0, 0, 0,
+        50, 50, 50, 50, 50, 50, 50, 50,
+        10, 10, 20, 30, 30, 20, 10, 10,
+        5, 5, 10, 25, 25, 10, 5, 5,
+        0, 0, 0, 20, 20, 0, 0, 0,
+        5, -5, -10, 0, 0, -10, -5, 5,
+        5, 10, 10, -20, -20, 10, 10, 5,
+        0, 0, 0, 0, 0, 0, 0, 0
+    ],
+    KNIGHT: [
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20, 0, 0, 0, 0, -20, -40,
+        -30, 0, 10, 15, 15, 10, 0, -30,
+        -30, 5, 15, 20, 20, 15, 5, -30,
+        -30, 0, 15, 20, 20, 15, 0, -30,
+        -30, 5, 10, 15, 15, 10, 5, -30,
+        -40, -20, 0, 5, 5, 0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50
+    ],
+    BISHOP: [
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 10, 10, 5, 0, -10,
+        -10, 5, 5, 10, 10, 5, 5, -10,
+        -10, 0, 10, 10, 10, 10, 0, -10,
+        -10, 10, 10, 10, 10, 10, 10, -10,
+        -10, 5, 0, 0, 0, 0, 5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20
+    ],
+    ROOK: [
+        0, 0, 0, 0, 0, 0, 0, 0,
+        5, 10, 10, 10, 10, 10, 10, 5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        0, 0, 0, 5, 5, 0, 0, 0
+    ],
+    QUEEN: [
+        -20, -10, -10, -5, -5, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 5, 5, 5, 0, -10,
+        -5, 0, 5, 5, 5, 5, 0, -5,
+        0, 0, 5, 5, 5, 5, 0, -5,
+        -10, 5, 5, 5, 5, 5, 0, -10,
+        -10, 0, 5, 0, 0, 0, 0, -10,
+        -20, -10, -10, -5, -5, -10, -10, -20
+    ],
+    KING: [
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+        20, 20, 0, 0, 0, 0, 20, 20,
+        20, 30, 10, 0, 0, 10, 30, 20
+    ]
+}
+
+
+def _piece_square(piece: int, square: int) -> int:
     """
-    Parent class for piece movement logic
+    Material and square bonus of `piece` on `square`, in
+    centipawns for white (so black's pieces count negative)
     """
-    def __init__(self, player: Player, piece_type: PieceType):
-        self._player = player
-        self._piece_type = piece_type
+    if piece == 0 or square & 0x88:
+        return 0
 
-    def allowed_moves(self, board):
-        """
-        All allowed moves for `self` in the given board state
-        """
-        pass
+    (rank, file) = (square >> 4, square & 7)
+    if piece < 0:
+        return PIECE_VALUES[-piece] + PIECE_SQUARE_TABLES[-piece][(7 - rank) * 8 + file]
 
-    @property
-    def player(self):
-        return self._player
+    return -(PIECE_VALUES[piece] + PIECE_SQUARE_TABLES[piece][rank * 8 + file])
 
-    @property
-    def piece_type(self):
-        return self._piece_type
 
-    def __str__(self):
-        return f'{str(self._player)}{str(self._piece_type)}'
+# `_piece_square` of every piece on every square, indexed like `ZOBRIST_PIECES`
+PIECE_SQUARES = [
+    [_piece_square(piece, square) for square in range(128)]
+    for piece in list(range(0, 7)) + list(range(-6, 0))
+]
 
+# Pawn structure terms in centipawns, the passed pawn bonus by ranks advanced
+DOUBLED_PAWN = -10
+ISOLATED_PAWN = -15
+PASSED_PAWN = (0, 5, 10, 20, 35, 60, 100, 0)
+# Pawn structures remembered before the cache starts over
+PAWN_CACHE_SIZE = 1 << 14
 
-class Pawn(Piece):
-    """
-    Pawn
-    """
-    def __init__(self, player: Player):
-        super().__init__(player, PieceType.PAWN)
+# Zobrist values of each piece on each square, indexed by piece then square
+_PIECE_KEYS = zobrist_table((square, piece) for square in SQUARES for piece in range(-6, 7) if piece != 0)
+ZOBRIST_PIECES = [
+    [_PIECE_KEYS.get((square, piece), 0) for square in range(128)]
+    for piece in list(range(0, 7)) + list(range(-6, 0))
+]
+ZOBRIST_CASTLING = list(zobrist_table(range(16), seed=0xca57).values())
+ZOBRIST_EP = list(zobrist_table(range(8), seed=0xe9).values())
+ZOBRIST_BLACK = zobrist_table(['black'], seed=0xb1ac)['black']
 
-    def allowed_moves(self, board):
-        """
-        All allowed moves for `self` in the given board state
-        """
-        pass
 
+def square_name(square: int) -> str:
+    """
+    Algebraic name of 0x88 `square`
 
-class Rook(Piece):
+    >>> square_name(0x00), square_name(0x74)
+    ('a1', 'e8')
     """
-    Rook
+    return 'abcdefgh'[square & 7] + str((square >> 4) + 1)
+
+
+def parse_square(name: str) -> int:
     """
-    def __init__(self, player: Player):
-        super().__init__(player, PieceType.ROOK)
+    0x88 square of algebraic `name`
 
-    def allowed_moves(self, board):
-        """
-        All allowed moves for `self` in the given board state
-        """
-        pass
+    >>> hex(parse_square('e8'))
+    '0x74'
+    """
+    return (int(name[1]) - 1) * 16 + 'abcdefgh'.index(name[0])
 
 
-class Knight(Piece):
+def encode_move(from_square: int, to_square: int, promotion=0) -> int:
     """
-    Knight
+    Move as one int: from square, to square and promotion piece type
     """
-    def __init__(self, player: Player):
-        super().__init__(player, PieceType.KNIGHT)
-
-    def allowed_moves(self, board):
-        """
-        All allowed moves for `self` in the given board state
-        """
-        pass
+    return from_square | to_square << 7 | promotion << 14
 
 
-class Bishop(Piece):
+def move_name(move: int) -> str:
     """
-    Bishop
+    Move in long algebraic (UCI) notation
+
+    >>> move_name(encode_move(0x64, 0x74, QUEEN))
+    'e7e8q'
     """
-    def __init__(self, player: Player):
-        super().__init__(player, PieceType.BISHOP)
+    promotion = move >> 14
+    name = square_name(move & 127) + square_name(move >> 7 & 127)
 
-    def allowed_moves(self, board):
-        """
-        All allowed moves for `self` in the given board state
-        """
-        pass
+    return name + str(PieceType(promotion)).lower() if promotion else name
 
 
-class King(Piece):
+class Chess(Game):
     """
-    King
+    Chess game on a 0x88 board, set up from `fen`
     """
-    def __init__(self, player: Player):
-        super().__init__(player, PieceType.KING)
+    __slots__ = (
+        '_board', '_turn', '_castling', '_ep', '_halfmove', '_fullmove',
+        '_kings', '_hash', '_legal', '_ply', '_undo', '_material',
+        '_pawn_hash', '_pawn_cache'
+    )
+
+    def __init__(self, fen=START_FEN):
+        # Piece on each 0x88 square
+        self._board = array('b', bytes(128))
+        # King squares indexed by `Player.value`
+        self._kings = [None, -1, -1]
+        # Undo records of the moves made so far, reused from ply to ply: the move, captured
+        # piece, castling rights, en passant square, halfmove clock, hash, material and pawn hash
+        self._undo = [[0] * 8 for _ in range(UNDO_CAPACITY)]
+        self._ply = 0
+        # Legal moves as (hash, player, moves) for the last position they were generated for
+        self._legal = None
+        # Pawn structure score by `_pawn_hash`
+        self._pawn_cache = dict()
+
+        (placement, turn, castling, ep, halfmove, fullmove) = (fen.split() + ['0', '1'])[:6]
+
+        for (rank, row) in enumerate(reversed(placement.split('/'))):
+            file = 0
+            for char in row:
+                if char.isdigit():
+                    file += int(char)
+                    continue
+
+                player = Player.W if char.isupper() else Player.B
+                piece = FEN_PIECES[char.lower()] * player.value
+                self._board[rank * 16 + file] = piece
+                if abs(piece) == KING:
+                    self._kings[player.value] = rank * 16 + file
+                file += 1
+
+        self._turn = Player.W if turn == 'w' else Player.B
+        self._castling = sum(CASTLING_LETTERS[char] for char in castling if char in CASTLING_LETTERS)
+        self._ep = -1 if ep == '-' else parse_square(ep)
+        self._halfmove = int(halfmove)
+        self._fullmove = int(fullmove)
+
+        self._hash = ZOBRIST_CASTLING[self._castling]
+        # Material and square bonuses for white, and the Zobrist hash of the pawns alone
+        self._material = 0
+        self._pawn_hash = 0
+        for square in SQUARES:
+            piece = self._board[square]
+            self._hash ^= ZOBRIST_PIECES[piece][square]
+            self._material += PIECE_SQUARES[piece][square]
+            if abs(piece) == PAWN:
+                self._pawn_hash ^= ZOBRIST_PIECES[piece][square]
+        if self._ep != -1:
+            self._hash ^= ZOBRIST_EP[self._ep & 7]
+        if self._turn == Player.B:
+            self._hash ^= ZOBRIST_BLACK
+
+    def fen(self) -> str:
+        """
+        Forsyth-Edwards Notation of the current position
 
-    def allowed_moves(self, board):
+        >>> Chess().fen() == START_FEN
+        True
         """
-        All allowed moves for `self` in the given board state
+        rows = list()
+        for rank in range(7, -1, -1):
+            row = ''
+            empty = 0
+            for file in range(8):
+                piece = self._board[rank * 16 + file]
+                if piece == 0:
+                    empty += 1
+                    continue
+
+                if empty:
+                    row += str(empty)
+                    empty = 0
+                char = str(PieceType(abs(piece)))
+                row += char if piece < 0 else char.lower()
+            rows.append(row + (str(empty) if empty else ''))
+
+        castling = ''.join(char for (char, right) in CASTLING_LETTERS.items() if self._castling & right) or '-'
+        ep = '-' if self._ep == -1 else square_name(self._ep)
+        turn = 'w' if self._turn == Player.W else 'b'
+
+        return f"{'/'.join(rows)} {turn} {castling} {ep} {self._halfmove} {self._fullmove}"
+
+    def is_attacked(self, square: int, by: Player) -> bool:
         """
-        pass
-
+        Checks if any piece of `by` attacks `square`
 
-class Queen(Piece):
-    """
-    Queen
-    """
-    def __init__(self, player: Player):
-        super().__init__(player, PieceType.QUEEN)
+        >>> game = Chess()
+        >>> game.is_attacked(parse_square('f3'), Player.W), game.is_attacked(parse_square('e4'), Player.W)
+        (True, False)
+        """
+        board = self._board
+        sign = by.value
+
+        for attacker in PAWN_ATTACKERS[sign][square]:
+            if board[attacker] == PAWN * sign:
+                return True
+        for attacker in KNIGHT_TARGETS[square]:
+            if board[attacker] == KNIGHT * sign:
+                return True
+        for attacker in KING_TARGETS[square]:
+            if board[attacker] == KING * sign:
+                return True
+
+        for (rays, slider) in ((ROOK_RAYS, ROOK), (BISHOP_RAYS, BISHOP)):
+            for ray in rays[square]:
+                for attacker in ray:
+                    piece = board[attacker]
+                    if piece != 0:
+                        if piece == slider * sign or piece == QUEEN * sign:
+                            return True
+                        break
+
+        return False
+
+    def in_check(self, player: Player) -> bool:
+        """
+        Checks if `player`'s king is attacked
+        """
+        return self.is_attacked(self._kings[player.value], player.other())
 
-    def allowed_moves(self, board):
+    def _pseudo_moves(self, player: Player) -> Generator:
+        """
+        Moves for `player` that follow piece movement, without
+        checking whether they leave `player`'s king attacked
+        """
+        board = self._board
+        sign = player.value
+        forward = -16 * sign
+        ep = self._ep if player == self._turn else -1
+        start_rank = 1 if player == Player.W else 6
+        last_rank = 7 if player == Player.W else 0
+
+        for square in SQUARES:
+            piece = board[square] * sign
+            if piece <= 0:
+                continue
+
+            if piece == PAWN:
+                targets = list()
+                one = square + forward
+                if board[one] == 0:
+                    targets.append(one)
+                    if square >> 4 == start_rank and board[one + forward] == 0:
+                        yield square | (one + forward) << 7
+                for target in (one - 1, one + 1):
+                    if not target & 0x88 and (board[target] * sign < 0 or target == ep):
+                        targets.append(target)
+
+                for target in targets:
+                    if target >> 4 == last_rank:
+                        for promotion in PROMOTIONS:
+                            yield square | target << 7 | promotion << 14
+                    else:
+                        yield square | target << 7
+            elif piece == KNIGHT or piece == KING:
+                for target in (KNIGHT_TARGETS if piece == KNIGHT else KING_TARGETS)[square]:
+                    if board[target] * sign <= 0:
+                        yield square | target << 7
+            else:
+                rays = ROOK_RAYS[square] if piece == ROOK else BISHOP_RAYS[square]
+                if piece == QUEEN:
+                    rays = rays + ROOK_RAYS[square]
+
+                for ray in rays:
+                    for target in ray:
+                        captured = board[target] * sign
+                        if captured <= 0:
+                            yield square | target << 7
+                        if captured != 0:
+                            break
+
+        opponent = player.other()
+        for (right, king_from, king_to, empty, safe) in CASTLES[sign]:
+            if self._castling & right and all(board[square] == 0 for square in empty) \
+                    and not any(self.is_attacked(square, opponent) for square in safe):
+                yield king_from | king_to << 7
+
+    def allowed_moves(self, player: Player) -> Generator:
         """
-        All allowed moves for `self` in the given board state
+        Get all legal moves for `player` (moves as ints, see `encode_move`)
+
+        >>> len(list(Chess().allowed_moves(Player.W)))
+        20
+        >>> sorted(move_name(move) for move in Chess('4k3/8/8/8/8/8/8/R3K2R w KQ - 0 1').allowed_moves(Player.W))[:3]
+        ['a1a2', 'a1a3', 'a1a4']
+        >>> 'e1c1' in [move_name(move) for move in Chess('4k3/8/8/8/8/8/8/R3K2R w KQ - 0 1').allowed_moves(Player.W)]
+        True
+        >>> 'e1g1' in [move_name(move) for move in Chess('4kr2/8/8/8/8/8/8/R3K2R w KQ - 0 1').allowed_moves(Player.W)]
+        False
         """
-        pass
+        legal = self._legal
+        if legal is None or legal[0] != self._hash or legal[1] != player:
+            moves = list()
+            for move in list(self._pseudo_moves(player)):
+                self._make(move)
+                if not self.is_attacked(self._kings[player.value], player.other()):
+                    moves.append(move)
+                self._unmake()
 
+            legal = (self._hash, player, moves)
+            self._legal = legal
 
-class Chess(Game):
-    """
-    Chess game
-    """
-    _board = [
-        [Rook(Player.B), Knight(Player.B), Bishop(Player.B), Queen(Player.B), King(Player.B), Bishop(Player.B), Knight(Player.B), Rook(Player.B)],
-        [Pawn(Player.B), Pawn(Player.B), Pawn(Player.B), Pawn(Player.B), Pawn(Player.B), Pawn(Player.B), Pawn(Player.B), Pawn(Player.B)],
-        [None, None, None, None, None, None, None, None],
-        [None, None, None, None, None, None, None, None],
-        [None, None, None, None, None, None, None, None],
-        [None, None, None, None, None, None, None, None],
-        [Pawn(Player.W), Pawn(Player.W), Pawn(Player.W), Pawn(Player.W), Pawn(Player.W), Pawn(Player.W), Pawn(Player.W), Pawn(Player.W)],
-        [Rook(Player.W), Knight(Player.W), Bishop(Player.W), Queen(Player.W), King(Player.W), Bishop(Player.W), Knight(Player.W), Rook(Player.W)]
-    ]
-    _moves_queue = deque()
+        yield from legal[2]
 
-    def allowed_moves(self, player: Enum) -> Generator:
+    def move(self, player: Player, move_pos: int, enqueue=False):
         """
-        Get all allowed moves for `player`
+        Makes move for `player` at position `move_pos`
+        (assumes move at `move_pos` is allowed)
+
+        Undo information is always kept, since captures and lost
+        castling rights can't be worked out from the board afterwards
+
+        >>> game = Chess()
+        >>> for name in ['e2e4', 'd7d5', 'e4d5', 'e7e5', 'd5e6']:
+        ...     game.move(game.turn, game.parse_move(name))
+        >>> game.fen()
+        'rnbqkbnr/ppp2ppp/4P3/8/8/8/PPPP1PPP/RNBQKBNR b KQkq - 0 3'
+        >>> for _ in range(5):
+        ...     game.undo_move()
+        >>> game.fen() == START_FEN and game.hash_key() == Chess().hash_key()
+        True
+        """
+        self._make(move_pos)
+
+    def _make(self, move: int):
+        board = self._board
+        from_square = move & 127
+        to_square = move >> 7 & 127
+        promotion = move >> 14
+
+        piece = board[from_square]
+        captured = board[to_square]
+        sign = 1 if piece > 0 else -1
+        kind = piece * sign
+
+        ply = self._ply
+        if ply == len(self._undo):
+            self._undo.extend([0] * 8 for _ in range(ply))
+        record = self._undo[ply]
+        record[0] = move
+        record[1] = captured
+        record[2] = self._castling
+        record[3] = self._ep
+        record[4] = self._halfmove
+        record[5] = self._hash
+        record[6] = self._material
+        record[7] = self._pawn_hash
+        self._ply = ply + 1
+
+        h = self._hash ^ ZOBRIST_PIECES[piece][from_square] ^ ZOBRIST_PIECES[captured][to_square]
+        material = self._material - PIECE_SQUARES[piece][from_square] - PIECE_SQUARES[captured][to_square]
+        board[from_square] = 0
+
+        if captured == -PAWN * sign:
+            self._pawn_hash ^= ZOBRIST_PIECES[captured][to_square]
+
+        if kind == PAWN:
+            self._pawn_hash ^= ZOBRIST_PIECES[piece][from_square]
+            if to_square == self._ep:
+                # En passant captures the pawn beside the target square
+                passed = to_square + 16 * sign
+                h ^= ZOBRIST_PIECES[board[passed]][passed]
+                material -= PIECE_SQUARES[board[passed]][passed]
+                self._pawn_hash ^= ZOBRIST_PIECES[board[passed]][passed]
+                board[passed] = 0
+            if promotion:
+                piece = promotion * sign
+            else:
+                self._pawn_hash ^= ZOBRIST_PIECES[piece][to_square]
+        elif kind == KING:
+            self._kings[sign] = to_square
+            if to_square - from_square in (2, -2):
+                (rook_from, rook_to) = (from_square + 3, from_square + 1) if to_square > from_square else (from_square - 4, from_square - 1)
+                rook = board[rook_from]
+                board[rook_from] = 0
+                board[rook_to] = rook
+                h ^= ZOBRIST_PIECES[rook][rook_from] ^ ZOBRIST_PIECES[rook][rook_to]
+                material += PIECE_SQUARES[rook][rook_to] - PIECE_SQUARES[rook][rook_from]
+
+        board[to_square] = piece
+        h ^= ZOBRIST_PIECES[piece][to_square]
+        self._material = material + PIECE_SQUARES[piece][to_square]
+
+        if self._ep != -1:
+            h ^= ZOBRIST_EP[self._ep & 7]
+        self._ep = -1
+        if kind == PAWN and to_square - from_square in (32, -32):
+            self._ep = (from_square + to_square) >> 1
+            h ^= ZOBRIST_EP[self._ep & 7]
+
+        castling = self._castling & CASTLING_MASKS[from_square] & CASTLING_MASKS[to_square]
+        h ^= ZOBRIST_CASTLING[self._castling] ^ ZOBRIST_CASTLING[castling]
+        self._castling = castling
+
+        self._halfmove = 0 if kind == PAWN or captured != 0 else self._halfmove + 1
+        if self._turn == Player.B:
+            self._fullmove += 1
+        self._turn = self._turn.other()
+        self._hash = h ^ ZOBRIST_BLACK
+
+    def _unmake(self):
+        self._ply -= 1
+        (move, captured, self._castling, ep, self._halfmove, self._hash, self._material, self._pawn_hash) = self._undo[self._ply]
+        board = self._board
+        from_square = move & 127
+        to_square = move >> 7 & 127
+
+        self._turn = self._turn.other()
+        if self._turn == Player.B:
+            self._fullmove -= 1
+        self._ep = ep
+
+        piece = board[to_square]
+        sign = 1 if piece > 0 else -1
+        if move >> 14:
+            piece = PAWN * sign
+
+        board[from_square] = piece
+        board[to_square] = captured
+
+        kind = piece * sign
+        if kind == PAWN and to_square == ep:
+            board[to_square + 16 * sign] = -PAWN * sign
+        elif kind == KING:
+            self._kings[sign] = from_square
+            if to_square - from_square in (2, -2):
+                (rook_from, rook_to) = (from_square + 3, from_square + 1) if to_square > from_square else (from_square - 4, from_square - 1)
+                board[rook_from] = board[rook_to]
+                board[rook_to] = 0
+
+    def parse_move(self, name: str) -> int:
         """
-        pieces = list()
-        for row in self._board:
-            pieces.extend((col for col in row if col is not None and col.player == player))
+        Legal move for the player to move from its UCI `name`
 
-        for piece in pieces:
-            for move in piece.allowed_moves(self._board):
-                yield move
+        >>> move_name(Chess().parse_move('g1f3'))
+        'g1f3'
+        """
+        for move in self.allowed_moves(self._turn):
+            if move_name(move) == name:
+                return move
 
+        raise ValueError(f'illegal move {name!r}')
 
-    def move(self, player: Enum, move_pos: object, enqueue=False):
+    def can_win(self, player: Enum):
         """
-        Makes move for `player` at position `move_pos`
-        (assumes move at `move_pos` is allowed)
+        Checks if `player` is able to win in one move
+        with the current board state
+
+        Finding mates in one means trying every reply to every
+        move, so this always answers False and leaves them to search
         """
-        pass
+        return False
 
     def undo_move(self):
         """
         Takes back most recent move in queue
+
+        >>> game = Chess()
+        >>> for _ in range(100):
+        ...     for name in ['g1f3', 'g8f6', 'f3g1', 'f6g8']:
+        ...         game.move(game.turn, game.parse_move(name))
+        >>> for _ in range(400):
+        ...     game.undo_move()
+        >>> game.fen() == START_FEN
+        True
+        """
+        if self._ply > 0:
+            self._unmake()
+
+    def hash_key(self) -> int:
+        """
+        Zobrist hash of the pieces, side to move, castling rights and en passant square
+
+        >>> game = Chess()
+        >>> for name in ['g1f3', 'g8f6', 'f3g1', 'f6g8']:
+        ...     game.move(game.turn, game.parse_move(name))
+        >>> game.hash_key() == Chess().hash_key()
+        True
         """
-        pass
+        return self._hash
 
     def other(self, player: Enum) -> Enum:
         """
         Inverse player from `player`
         """
-        pass
+        return player.other()
 
     def score(self, player: Enum, depth: int) -> float:
         """
-        Score for `player` at search depth `depth` for current game state
+        Score for `player` at search depth `depth` for current game
+        state: won or lost, drawn, or else the `evaluate` estimate
+
+        >>> game = Chess('7k/6Q1/6K1/8/8/8/8/8 b - - 0 1')
+        >>> game.score(Player.W, 2), game.score(Player.B, 2)
+        (500.0, -500.0)
+        >>> Chess('7k/5Q2/6K1/8/8/8/8/8 b - - 0 1').score(Player.W, 2)
+        0
+        """
+        if self.is_winner(player):
+            return 1000 / depth
+        elif self.is_winner(player.other()):
+            return -1000 / depth
+        elif self.is_over():
+            return 0
+
+        return self.evaluate(player)
+
+    def evaluate(self, player: Enum) -> float:
+        """
+        Material, piece-square and pawn structure balance for `player`, in pawns
+
+        Material and square bonuses are kept up to date by every move, and the
+        pawn structure is only worked out once for each arrangement of pawns
+
+        >>> Chess().evaluate(Player.W)
+        0.0
+        >>> game = Chess('4k3/8/8/8/8/8/8/3QK3 w - - 0 1')
+        >>> (game.evaluate(Player.W), game.evaluate(Player.B))
+        (8.95, -8.95)
+
+        Every kind of move keeps the running totals equal to a fresh count
+
+        >>> game = Chess('r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1')
+        >>> def totals(game):
+        ...     return (game._material, game._pawn_hash)
+        >>> matches = list()
+        >>> for move in list(game.allowed_moves(game.turn)):
+        ...     game.move(game.turn, move, enqueue=True)
+        ...     for reply in list(game.allowed_moves(game.turn)):
+        ...         game.move(game.turn, reply, enqueue=True)
+        ...         matches.append(totals(game) == totals(Chess(game.fen())))
+        ...         game.undo_move()
+        ...     game.undo_move()
+        >>> (len(matches), all(matches), totals(game) == totals(Chess(game.fen())))
+        (264, True, True)
         """
-        pass
+        return (self._material + self._pawn_structure()) * -player.value / 100
+
+    def _pawn_structure(self) -> int:
+        """
+        Doubled, isolated and passed pawn terms in centipawns for white
+
+        >>> Chess('4k3/7p/8/8/8/8/PP5P/4K3 w - - 0 1')._pawn_structure()
+        10
+        """
+        score = self._pawn_cache.get(self._pawn_hash)
+        if score is not None:
+            return score
+
+        board = self._board
+        # Pawn squares indexed by `Player.value`
+        pawns = [None, list(), list()]
+        for square in SQUARES:
+            if board[square] == PAWN:
+                pawns[1].append(square)
+            elif board[square] == -PAWN:
+                pawns[-1].append(square)
+
+        score = 0
+        for sign in (-1, 1):
+            files = [0] * 8
+            for square in pawns[sign]:
+                files[square & 7] += 1
+
+            side = sum(DOUBLED_PAWN * (count - 1) for count in files if count > 1)
+            for square in pawns[sign]:
+                (rank, file) = (square >> 4, square & 7)
+
+                if (file == 0 or files[file - 1] == 0) and (file == 7 or files[file + 1] == 0):
+                    side += ISOLATED_PAWN
+
+                # Passed if no enemy pawn is ahead on this file or the files beside it
+                ahead = (lambda other: other > rank) if sign < 0 else (lambda other: other < rank)
+                if not any(abs((enemy & 7) - file) <= 1 and ahead(enemy >> 4) for enemy in pawns[-sign]):
+                    side += PASSED_PAWN[rank if sign < 0 else 7 - rank]
+
+            score -= side * sign
+
+        if len(self._pawn_cache) >= PAWN_CACHE_SIZE:
+            self._pawn_cache.clear()
+        self._pawn_cache[self._pawn_hash] = score
+
+        return score
 
     def is_over(self) -> bool:
         """
-        Checks if game is at a terminal state
+        Checks if game is at a terminal state: checkmate,
+        stalemate or fifty moves without a capture or pawn move
+
+        >>> Chess().is_over()
+        False
+        >>> Chess('7k/5Q2/6K1/8/8/8/8/8 b - - 0 1').is_over()
+        True
         """
-        pass
+        if self._halfmove >= 100:
+            return True
+
+        return next(self.allowed_moves(self._turn), None) is None
 
     def is_winner(self, player: Enum) -> bool:
         """
         Checks if `player` has won
+
+        >>> game = Chess('7k/6Q1/6K1/8/8/8/8/8 b - - 0 1')
+        >>> game.is_winner(Player.W), game.is_winner(Player.B)
+        (True, False)
         """
-        pass
+        loser = player.other()
+        return self._turn == loser and self.in_check(loser) and next(self.allowed_moves(loser), None) is None
+
+    def clone(self) -> 'Chess':
+        """
+        Independent copy of the game
+
+        >>> game = Chess()
+        >>> copy = game.clone()
+        >>> copy.move(Player.W, copy.parse_move('e2e4'))
+        >>> game.fen() == START_FEN
+        True
+        """
+        game = type(self).__new__(type(self))
+        for name in ('_turn', '_castling', '_ep', '_halfmove', '_fullmove', '_hash', '_legal', '_ply', '_material', '_pawn_hash'):
+            setattr(game, name, getattr(self, name))
+
+        game._board = self._board[:]
+        game._kings = self._kings[:]
+        game._undo = [record[:] for record in self._undo]
+        # Entries depend only on the pawns, so copies can share them
+        game._pawn_cache = self._pawn_cache
+        return game
+
+    @property
+    def turn(self) -> Player:
+        """
+        Player to move
+        """
+        return self._turn
 
     def __str__(self):
         sep = '  -------------------------\n'
         footer = '   A  B  C  D  E  F  G  H'
 
-        piece_str = lambda p: '  ' if p is None else str(p)
-        rows = (f'{8 - i} |' + '|'.join([piece_str(col) for col in row]) + '|\n' for (i, row) in enumerate(self._board))
+        def piece_str(piece):
+            if piece == 0:
+                return '  '
+            return f'{Player.W if piece < 0 else Player.B}{PieceType(abs(piece))}'
+
+        rows = (
+            f'{rank + 1} |' + '|'.join(piece_str(self._board[rank * 16 + file]) for file in range(8)) + '|\n'
+            for rank in range(7, -1, -1)
+        )
 
         return sep + sep.join(rows) + sep + footer
 
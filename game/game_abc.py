@@ -1,3 +1,4 @@
+import copy
 from collections.abc import Generator
 from abc import ABC, abstractmethod
 from enum import Enum
@@ -7,6 +8,8 @@ class Game(ABC):
     """
     Base class for game logic
     """
+    __slots__ = ()
+
     @abstractmethod
     def allowed_moves(self, player: Enum) -> Generator:
         """
@@ -37,6 +40,41 @@ class Game(ABC):
         """
         pass
 
+    @abstractmethod
+    def hash_key(self) -> int:
+        """
+        Zobrist hash of the current game state, kept up to
+        date incrementally by `move` and `undo_move`
+        """
+        pass
+
+    def canonical_key(self) -> int:
+        """
+        Hash shared by every symmetric variant of the current
+        game state (games without symmetries use `hash_key`)
+        """
+        return self.hash_key()
+
+    def move_hint(self, player: Enum, move_pos: object) -> int:
+        """
+        Static guess of how good `move_pos` is for `player`, used
+        to order moves for search (higher is searched first)
+        """
+        return 0
+
+    def evaluate(self, player: Enum) -> float:
+        """
+        Static estimate of how good the current state is for `player`,
+        used where search stops before the game is over (0 is even)
+        """
+        return 0
+
+    def clone(self) -> 'Game':
+        """
+        Independent copy of the game, sharing no mutable state with `self`
+        """
+        return copy.deepcopy(self)
+
     @abstractmethod
     def other(self, player: Enum) -> Enum:
         """
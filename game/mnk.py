@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+
+from enum import Enum
+from collections import deque
+from collections.abc import Generator
+from itertools import product
+
+from game_abc import Game
+from zobrist import zobrist_table
+from game.tictactoe import Piece
+
+
+class MNKGame(Game):
+    """
+    Generalized Tic-Tac-Toe: `k` in a row wins on a board of any
+    `shape`, e.g. (15, 15) with k = 5 (Gomoku) or (4, 4, 4) with k = 4
+    """
+    __slots__ = (
+        '_shape', '_k', '_coords', '_index', '_rays', '_square_segments', '_zobrist',
+        '_board', '_empty', '_winner', '_moves_queue', '_hash', '_segment_sums', '_sum_counts'
+    )
+
+    def __init__(self, shape=(3, 3), k=3):
+        self._shape = tuple(shape)
+        self._k = k
+
+        self._coords = list(product(*(range(size) for size in self._shape)))
+        self._index = {coord: index for (index, coord) in enumerate(self._coords)}
+        self._rays = [self._lines_through(coord) for coord in self._coords]
+        segments = self._segments()
+        # Indices into `segments` of the segments through each square
+        self._square_segments = [list() for _ in self._coords]
+        for (number, segment) in enumerate(segments):
+            for index in segment:
+                self._square_segments[index].append(number)
+        self._zobrist = zobrist_table((index, piece) for index in range(len(self._coords)) for piece in (Piece.X, Piece.O))
+
+        self._board = [Piece.S] * len(self._coords)
+        self._empty = len(self._board)
+        self._winner = None
+        self._moves_queue = deque()
+        self._hash = 0
+        # Sum of piece values along each segment, and the number of
+        # segments with each sum, offset by `k` (`k` - 1 times a piece's
+        # value is that piece one move away from filling the segment)
+        self._segment_sums = [0] * len(segments)
+        self._sum_counts = [0] * (2 * k + 1)
+        self._sum_counts[k] = len(segments)
+
+    def _directions(self) -> list:
+        """
+        One step along each line direction, counting
+        a direction and its reverse only once
+        """
+        return [
+            step for step in product((-1, 0, 1), repeat=len(self._shape))
+            if any(step) and next(s for s in step if s != 0) > 0
+        ]
+
+    def _segments(self) -> list:
+        """
+        Squares of every run of `k` squares in a line, any of
+        which filled by one player is a win
+
+        >>> len(MNKGame((3, 3), 3)._segments())
+        8
+        >>> len(MNKGame((4, 4, 4), 4)._segments())
+        76
+        """
+        segments = list()
+
+        for step in self._directions():
+            for coord in self._coords:
+                squares = [tuple(c + distance * s for (c, s) in zip(coord, step)) for distance in range(self._k)]
+                if all(square in self._index for square in squares):
+                    segments.append([self._index[square] for square in squares])
+
+        return segments
+
+    def _lines_through(self, coord: tuple) -> list:
+        """
+        For every line direction, the squares up to `k` - 1 steps
+        away from `coord` going forward and going backward
+        """
+        rays = list()
+
+        for step in self._directions():
+            ray = list()
+            for sign in (1, -1):
+                squares = list()
+                for distance in range(1, self._k):
+                    square = tuple(c + sign * distance * s for (c, s) in zip(coord, step))
+                    if square not in self._index:
+                        break
+                    squares.append(self._index[square])
+                ray.append(squares)
+            rays.append(ray)
+
+        return rays
+
+    def _update_segments(self, index: int, change: int) -> bool:
+        """
+        Add `change` to the sums of the segments through square
+        `index`, returning whether any of them became full of one piece
+        """
+        segment_sums = self._segment_sums
+        sum_counts = self._sum_counts
+        k = self._k
+        full = False
+
+        for segment in self._square_segments[index]:
+            sum_counts[segment_sums[segment] + k] -= 1
+            segment_sums[segment] += change
+            sum_counts[segment_sums[segment] + k] += 1
+            full = full or abs(segment_sums[segment]) == k
+
+        return full
+
+    def allowed_moves(self, player: Piece) -> Generator:
+        """
+        Get all allowed moves for `player`
+
+        >>> game = MNKGame((2, 2), 2)
+        >>> game.move(Piece.X, (0, 1))
+        >>> list(game.allowed_moves(Piece.O))
+        [(0, 0), (1, 0), (1, 1)]
+        """
+        for (index, piece) in enumerate(self._board):
+            if piece == Piece.S:
+                yield self._coords[index]
+
+    def move(self, player: Piece, move: tuple, enqueue=False):
+        """
+        Makes move for `player` at position `move`
+        (assumes move at `move` is allowed) and checks the
+        segments through it for a win
+
+        >>> game = MNKGame((4, 4, 4), 4)
+        >>> for move in [(0, 0, 0), (1, 1, 1), (2, 2, 2)]:
+        ...     game.move(Piece.O, move, enqueue=True)
+        >>> game.is_winner(Piece.O)
+        False
+        >>> game.move(Piece.O, (3, 3, 3), enqueue=True)
+        >>> game.is_winner(Piece.O)
+        True
+        >>> game.undo_move()
+        >>> game.is_winner(Piece.O)
+        False
+        """
+        index = self._index[move]
+
+        if enqueue:
+            self._moves_queue.appendleft((index, self._winner))
+
+        self._board[index] = player
+        self._empty -= 1
+        self._hash ^= self._zobrist[(index, player)]
+
+        if self._update_segments(index, player.value) and self._winner is None:
+            self._winner = player
+
+    def can_win(self, player: Enum):
+        """
+        Checks if `player` is able to win in one move
+        with the current board state
+
+        >>> game = MNKGame((5, 5), 4)
+        >>> for move in [(1, 1), (2, 2), (3, 3)]:
+        ...     game.move(Piece.X, move)
+        >>> game.can_win(Piece.X)
+        True
+        >>> game.can_win(Piece.O)
+        False
+        >>> game.move(Piece.O, (0, 0))
+        >>> game.can_win(Piece.X)
+        True
+        >>> game.move(Piece.O, (4, 4))
+        >>> game.can_win(Piece.X)
+        False
+        """
+        if player is None or player == Piece.S or self._empty == 0:
+            return False
+
+        # A segment holding `k` - 1 of `player`'s pieces and a space
+        return self._winner == player or self._sum_counts[(self._k - 1) * player.value + self._k] > 0
+
+    def undo_move(self):
+        """
+        Takes back most recent move in queue
+
+        >>> game = MNKGame()
+        >>> game.move(Piece.X, (1, 1), enqueue=True)
+        >>> game.undo_move()
+        >>> list(game.allowed_moves(Piece.X)) == game._coords
+        True
+        >>> game.hash_key()
+        0
+        """
+        if len(self._moves_queue) == 0:
+            return
+
+        (index, winner) = self._moves_queue.popleft()
+
+        self._hash ^= self._zobrist[(index, self._board[index])]
+        self._update_segments(index, -self._board[index].value)
+        self._board[index] = Piece.S
+        self._empty += 1
+        self._winner = winner
+
+    def hash_key(self) -> int:
+        """
+        Zobrist hash of the current board
+        """
+        return self._hash
+
+    def move_hint(self, player: Piece, move: tuple) -> int:
+        """
+        Number of occupied squares next to `move` along its lines,
+        since play away from every other piece rarely matters
+
+        >>> game = MNKGame((15, 15), 5)
+        >>> game.move(Piece.X, (7, 7))
+        >>> game.move(Piece.O, (7, 9))
+        >>> [game.move_hint(Piece.X, move) for move in [(7, 8), (6, 6), (0, 0)]]
+        [2, 1, 0]
+        """
+        board = self._board
+        hint = 0
+
+        for ray in self._rays[self._index[move]]:
+            for squares in ray:
+                if len(squares) > 0 and board[squares[0]] != Piece.S:
+                    hint += 1
+
+        return hint
+
+    def other(self, player: Piece) -> Piece:
+        """
+        Inverse piece from `player`
+        """
+        return player.other()
+
+    def score(self, player: Piece, depth: int) -> float:
+        """
+        Score of `player` at search depth `depth` for current game state
+
+        >>> game = MNKGame((15, 15), 5)
+        >>> for move in [(7, 3), (7, 4), (7, 5), (7, 6), (7, 7)]:
+        ...     game.move(Piece.X, move)
+        >>> game.score(Piece.X, 2)
+        500.0
+        >>> game.score(Piece.O, 2)
+        -500.0
+        """
+        if self._winner == player:
+            return 1000 / depth
+        elif self._empty == 0:
+            return 0
+        else:
+            return -1000 / depth
+
+    def is_over(self) -> bool:
+        """
+        Checks if game is at a terminal state
+
+        >>> game = MNKGame((1, 2), 2)
+        >>> game.move(Piece.X, (0, 0))
+        >>> game.is_over()
+        False
+        >>> game.move(Piece.O, (0, 1))
+        >>> game.is_over()
+        True
+        """
+        return self._winner is not None or self._empty == 0
+
+    def is_winner(self, player: Piece) -> bool:
+        """
+        Checks if `player` has won
+        """
+        return player is not None and self._winner == player
+
+    def clone(self) -> 'MNKGame':
+        """
+        Independent copy of the game, sharing the board geometry
+        (which never changes) instead of computing it again
+
+        >>> game = MNKGame((4, 4), 3)
+        >>> game.move(Piece.X, (1, 1), enqueue=True)
+        >>> copy = game.clone()
+        >>> copy.move(Piece.O, (0, 0), enqueue=True)
+        >>> (len(list(game.allowed_moves(Piece.O))), len(list(copy.allowed_moves(Piece.X))))
+        (15, 14)
+        """
+        game = type(self).__new__(type(self))
+        for name in ('_shape', '_k', '_coords', '_index', '_rays', '_square_segments', '_zobrist', '_empty', '_winner', '_hash'):
+            setattr(game, name, getattr(self, name))
+
+        game._board = self._board[:]
+        game._segment_sums = self._segment_sums[:]
+        game._sum_counts = self._sum_counts[:]
+        game._moves_queue = deque(self._moves_queue)
+        return game
+
+    @property
+    def shape(self):
+        return self._shape
+
+    @property
+    def k(self):
+        return self._k
+
+    def __str__(self):
+        def grid(offset, shape):
+            if len(shape) == 1:
+                return ' ' + ' | '.join(str(self._board[offset + i]) for i in range(shape[0])) + '\n'
+
+            size = 1
+            for dim in shape[1:]:
+                size *= dim
+
+            parts = [grid(offset + i * size, shape[1:]) for i in range(shape[0])]
+            if len(shape) == 2:
+                sep = '-' * (4 * shape[1] - 1) + '\n'
+            else:
+                sep = '\n'
+            return sep.join(parts)
+
+        return grid(0, self._shape)
+
+    __repr__ = __str__
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
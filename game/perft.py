@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from game.chess import Chess, START_FEN, move_name
+
+
+# Standard perft positions as (name, FEN, leaf counts at depth 1, 2, ...)
+REFERENCE_POSITIONS = [
+    ('start', START_FEN, [20, 400, 8902, 197281, 4865609]),
+    ('kiwipete', 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1', [48, 2039, 97862, 4085603]),
+    ('position3', '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1', [14, 191, 2812, 43238, 674624]),
+    ('position4', 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1', [6, 264, 9467, 422333]),
+    ('position5', 'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8', [44, 1486, 62379, 2103487]),
+    ('position6', 'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10', [46, 2079, 89890, 3894594])
+]
+
+
+def perft(game: Chess, depth: int, bulk=True) -> int:
+    """
+    Number of move sequences `depth` plies long from the current position
+
+    With `bulk`, the last ply counts the legal moves instead of making each one
+
+    >>> perft(Chess(), 2)
+    400
+    >>> perft(Chess(), 2, bulk=False)
+    400
+    """
+    if depth == 0:
+        return 1
+
+    player = game.turn
+    moves = list(game.allowed_moves(player))
+    if bulk and depth == 1:
+        return len(moves)
+
+    nodes = 0
+    for move in moves:
+        game.move(player, move, enqueue=True)
+        nodes += perft(game, depth - 1, bulk)
+        game.undo_move()
+
+    return nodes
+
+
+def _perft_root_move(fen: str, name: str, depth: int, bulk: bool) -> tuple:
+    """
+    Perft below root move `name` in a worker process
+    """
+    game = Chess(fen)
+    game.move(game.turn, game.parse_move(name), enqueue=True)
+
+    return (name, perft(game, depth - 1, bulk))
+
+
+def divide(fen: str, depth: int, bulk=True, workers=1) -> dict:
+    """
+    Perft count below each root move, by move name, split across
+    `workers` processes (one task per root move) when more than one
+
+    >>> counts = divide(START_FEN, 2)
+    >>> (counts['e2e4'], sum(counts.values()))
+    (20, 400)
+    >>> divide(START_FEN, 0)
+    Traceback (most recent call last):
+    ...
+    ValueError: depth must be at least 1 to divide, got 0
+    """
+    if depth < 1:
+        raise ValueError(f'depth must be at least 1 to divide, got {depth}')
+
+    game = Chess(fen)
+    names = [move_name(move) for move in game.allowed_moves(game.turn)]
+
+    if workers <= 1:
+        return dict(_perft_root_move(fen, name, depth, bulk) for name in names)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_perft_root_move, fen, name, depth, bulk) for name in names]
+        return dict(future.result() for future in futures)
+
+
+def check(max_depth: int, bulk=True, workers=1) -> list:
+    """
+    Compare perft of every reference position up to `max_depth` against
+    the known counts, returning (name, depth, expected, counted, seconds)
+
+    >>> all(expected == counted for (_, _, expected, counted, _) in check(2))
+    True
+    """
+    results = list()
+
+    for (name, fen, counts) in REFERENCE_POSITIONS:
+        for (depth, expected) in enumerate(counts[:max_depth], 1):
+            start_time = time.perf_counter()
+            counted = sum(divide(fen, depth, bulk, workers).values())
+            results.append((name, depth, expected, counted, time.perf_counter() - start_time))
+
+    return results
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description='Count chess move paths to validate and time move generation')
+    parser.add_argument('fen', nargs='?', default=START_FEN)
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--divide', action='store_true', help='print the count below each root move')
+    parser.add_argument('--check', action='store_true', help='check the reference positions up to --depth instead')
+    parser.add_argument('--no-bulk', action='store_true', help='make every move at the last ply too')
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args(argv)
+    bulk = not args.no_bulk
+
+    if args.depth < 1:
+        parser.error('--depth must be at least 1')
+
+    if args.check:
+        failures = 0
+        for (name, depth, expected, counted, seconds) in check(args.depth, bulk, args.workers):
+            status = 'ok' if counted == expected else f'FAIL (expected {expected})'
+            failures += counted != expected
+            print(f'{name:10} depth {depth}: {counted:10} nodes {seconds:8.2f}s {counted / seconds:10.0f} nodes/s  {status}')
+        return 1 if failures > 0 else 0
+
+    start_time = time.perf_counter()
+    counts = divide(args.fen, args.depth, bulk, args.workers)
+    seconds = time.perf_counter() - start_time
+
+    if args.divide:
+        for (name, count) in sorted(counts.items()):
+            print(f'{name}: {count}')
+
+    nodes = sum(counts.values())
+    print(f'{nodes} nodes in {seconds:.2f}s ({nodes / seconds:.0f} nodes/s)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
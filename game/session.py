@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+from enum import Enum
+from itertools import count
+
+from game_abc import Game
+
+
+class Session(object):
+    """
+    One game hosted by a `SessionManager`, with the player to move
+    """
+    __slots__ = ('_id', '_game', '_player')
+
+    def __init__(self, session_id: int, game: Game, player: Enum):
+        self._id = session_id
+        self._game = game
+        self._player = player
+
+    def play(self, move: object):
+        """
+        Plays `move` for the player to move and passes the turn
+
+        >>> from game.tictactoe import TicTacToe, Piece
+        >>> session = Session(1, TicTacToe(), Piece.X)
+        >>> session.play((1, 1))
+        >>> str(session.player)
+        'O'
+        >>> session.play((1, 1))
+        Traceback (most recent call last):
+            ...
+        ValueError: illegal move (1, 1)
+        """
+        if self._game.is_over():
+            raise ValueError('game is over')
+        if move not in self._game.allowed_moves(self._player):
+            raise ValueError(f'illegal move {move!r}')
+
+        self._game.move(self._player, move, enqueue=True)
+        self._player = self._game.other(self._player)
+
+    def undo(self):
+        """
+        Takes back the most recent move and gives the turn back
+        """
+        self._game.undo_move()
+        self._player = self._game.other(self._player)
+
+    def winner(self) -> Enum:
+        """
+        Player who has won, or None
+        """
+        for player in (self._player, self._game.other(self._player)):
+            if self._game.is_winner(player):
+                return player
+
+        return None
+
+    @property
+    def id(self) -> int:
+        return self._id
+
+    @property
+    def game(self) -> Game:
+        return self._game
+
+    @property
+    def player(self) -> Enum:
+        return self._player
+
+
+class SessionManager(object):
+    """
+    Hosts many independent games in one process, each
+    made by `game_factory` and started by `first_player`
+
+    >>> from game.tictactoe import TicTacToe, Piece
+    >>> sessions = SessionManager(TicTacToe, Piece.X)
+    >>> (a, b) = (sessions.open(), sessions.open())
+    >>> a.play((0, 0))
+    >>> b.play((2, 2))
+    >>> (str(a.game._board[0][0]), str(b.game._board[0][0]))
+    ('X', ' ')
+    >>> len(sessions)
+    2
+    """
+    def __init__(self, game_factory, first_player: Enum):
+        self._game_factory = game_factory
+        self._first_player = first_player
+        self._sessions = dict()
+        self._ids = count(1)
+
+    def open(self, game=None) -> Session:
+        """
+        Starts `game`, or a new game from `game_factory`
+        """
+        if game is None:
+            game = self._game_factory()
+
+        session = Session(next(self._ids), game, self._first_player)
+        self._sessions[session.id] = session
+        return session
+
+    def fork(self, session_id: int) -> Session:
+        """
+        Starts a new game from a copy of the position in session `session_id`
+
+        >>> from game.tictactoe import TicTacToe, Piece
+        >>> sessions = SessionManager(TicTacToe, Piece.X)
+        >>> original = sessions.open()
+        >>> original.play((1, 1))
+        >>> copy = sessions.fork(original.id)
+        >>> copy.play((0, 0))
+        >>> (str(copy.player), str(original.player), str(original.game._board[0][0]))
+        ('X', 'O', ' ')
+        """
+        original = self._sessions[session_id]
+        session = Session(next(self._ids), original.game.clone(), original.player)
+        self._sessions[session.id] = session
+        return session
+
+    def close(self, session_id: int):
+        """
+        Ends session `session_id`, if it is open
+        """
+        self._sessions.pop(session_id, None)
+
+    def __getitem__(self, session_id: int) -> Session:
+        return self._sessions[session_id]
+
+    def __contains__(self, session_id: int) -> bool:
+        return session_id in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __iter__(self):
+        return iter(self._sessions.values())
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
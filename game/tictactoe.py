@@ -1,10 +1,12 @@
 #!/usr/bin/env python3
 
 from enum import Enum
+from array import array
 from collections import deque
 from collections.abc import Generator
 
 from game_abc import Game
+from zobrist import zobrist_table
 
 
 class Piece(Enum):
@@ -40,15 +42,58 @@ class Piece(Enum):
         }[self]
 
 
+# Pieces indexed by `Piece.value`, so X is at -1 and O is at 1
+PIECES = (Piece.S, Piece.O, Piece.X)
+
+# Rotations and reflections of the 3x3 board, identity first
+SYMMETRIES = [
+    lambda i, j: (i, j),
+    lambda i, j: (j, 2 - i),
+    lambda i, j: (2 - i, 2 - j),
+    lambda i, j: (2 - j, i),
+    lambda i, j: (i, 2 - j),
+    lambda i, j: (2 - i, j),
+    lambda i, j: (j, i),
+    lambda i, j: (2 - j, 2 - i)
+]
+
+
+def symmetric_zobrist(zobrist: dict) -> dict:
+    """
+    Zobrist values of each (square, piece) under every board symmetry,
+    so all eight orientations' hashes can be updated together
+
+    >>> table = symmetric_zobrist(TicTacToe._zobrist)
+    >>> table[(0, 0, Piece.X)][0] == TicTacToe._zobrist[(0, 0, Piece.X)]
+    True
+    >>> table[(0, 0, Piece.X)][1] == TicTacToe._zobrist[(0, 2, Piece.X)]
+    True
+    """
+    return {
+        (i, j, piece): tuple(zobrist[(*symmetry(i, j), piece)] for symmetry in SYMMETRIES)
+        for (i, j, piece) in zobrist
+    }
+
+
+def square_lines(win_checks: list) -> list:
+    """
+    Indices into `win_checks` of the lines through each square
+
+    >>> square_lines(TicTacToe._win_checks)[1][1]
+    [1, 4, 6, 7]
+    """
+    return [
+        [[line for (line, win_check) in enumerate(win_checks) if (i, j) in win_check] for j in range(3)]
+        for i in range(3)
+    ]
+
+
 class TicTacToe(Game):
     """
     TicTacToe game
     """
-    _board = [
-        [Piece.S, Piece.S, Piece.S],
-        [Piece.S, Piece.S, Piece.S],
-        [Piece.S, Piece.S, Piece.S]
-    ]
+    __slots__ = ('_squares', '_moves_queue', '_hashes', '_line_sums', '_sum_counts', '_empty')
+
     _win_checks = [
         # Rows
         [(0, 0), (0, 1), (0, 2)],
@@ -62,7 +107,73 @@ class TicTacToe(Game):
         [(0, 0), (1, 1), (2, 2)],
         [(0, 2), (1, 1), (2, 0)]
     ]
-    _moves_queue = deque()
+    _square_lines = square_lines(_win_checks)
+    _zobrist = zobrist_table((i, j, piece) for i in range(3) for j in range(3) for piece in (Piece.X, Piece.O))
+    _sym_zobrist = symmetric_zobrist(_zobrist)
+    # Number of `_win_checks` through each square, less two
+    _move_hints = [
+        [1, 0, 1],
+        [0, 2, 0],
+        [1, 0, 1]
+    ]
+
+    def __init__(self):
+        # `Piece.value` of each square, row by row
+        self._squares = array('b', bytes(9))
+        self._moves_queue = deque()
+        self._recount()
+
+    @property
+    def _board(self) -> list:
+        """
+        Rows of pieces on the board (assigning a new board recounts)
+        """
+        return [[PIECES[value] for value in self._squares[i * 3:i * 3 + 3]] for i in range(3)]
+
+    @_board.setter
+    def _board(self, board: list):
+        self._squares = array('b', (col.value for row in board for col in row))
+        self._recount()
+
+    def _recount(self):
+        """
+        Rebuild the hashes and counters kept up to date by `move` and `undo_move`
+        """
+        # Hash of the board under each of `SYMMETRIES`
+        self._hashes = [0] * len(SYMMETRIES)
+        # Sum of piece values along each of `_win_checks`
+        self._line_sums = [0] * len(self._win_checks)
+        # Number of lines with each sum, offset by 3 (-3 is a line of X, 2 is two O and a space)
+        self._sum_counts = [0] * 7
+        self._sum_counts[3] = len(self._win_checks)
+        self._empty = 9
+
+        for (square, value) in enumerate(self._squares):
+            if value != 0:
+                (i, j) = divmod(square, 3)
+                self._update_hashes(i, j, PIECES[value])
+                self._update_lines(i, j, value)
+                self._empty -= 1
+
+    def _update_lines(self, i: int, j: int, change: int):
+        """
+        Add `change` to the sums of the lines through (`i`, `j`)
+        """
+        line_sums = self._line_sums
+        sum_counts = self._sum_counts
+
+        for line in self._square_lines[i][j]:
+            sum_counts[line_sums[line] + 3] -= 1
+            line_sums[line] += change
+            sum_counts[line_sums[line] + 3] += 1
+
+    def _update_hashes(self, i: int, j: int, player: Piece):
+        """
+        Toggle `player` at (`i`, `j`) in every orientation's hash
+        """
+        hashes = self._hashes
+        for (s, value) in enumerate(self._sym_zobrist[(i, j, player)]):
+            hashes[s] ^= value
 
     def allowed_moves(self, player: Piece) -> Generator:
         """
@@ -76,10 +187,9 @@ class TicTacToe(Game):
         >>> list(game.allowed_moves(None))
         [(0, 2), (1, 0), (1, 2), (2, 0), (2, 1), (2, 2)]
         """
-        for (i, row) in enumerate(self._board):
-            for (j, col) in enumerate(row):
-                if col == Piece.S:
-                    yield (i, j)
+        for (square, value) in enumerate(self._squares):
+            if value == 0:
+                yield divmod(square, 3)
 
     def move(self, player: Piece, move: tuple, enqueue=False):
         """
@@ -98,7 +208,10 @@ class TicTacToe(Game):
         if enqueue:
             self._moves_queue.appendleft(move)
 
-        self._board[move[0]][move[1]] = player
+        self._squares[move[0] * 3 + move[1]] = player.value
+        self._update_hashes(move[0], move[1], player)
+        self._update_lines(move[0], move[1], player.value)
+        self._empty -= 1
 
     def can_win(self, player: Enum):
         """
@@ -112,20 +225,15 @@ class TicTacToe(Game):
         >>> game._board = [[Piece.X, Piece.X, Piece.S], [Piece.S, Piece.S, Piece.S], [Piece.S, Piece.S, Piece.S]]
         >>> game.can_win(Piece.O)
         False
+        >>> game._board = [[Piece.X, Piece.X, Piece.X], [Piece.O, Piece.O, Piece.S], [Piece.S, Piece.S, Piece.S]]
+        >>> game.can_win(Piece.X)
+        True
         """
-        for (i, row) in enumerate(self._board):
-            for (j, col) in enumerate(row):
-                if col != Piece.S:
-                    continue
-
-                self._board[i][j] = player
-                winner = self.is_winner(player)
-                self._board[i][j] = Piece.S
-
-                if winner:
-                    return True
+        if player == None or player == Piece.S:
+            return False
 
-        return False
+        # Two of `player`'s pieces and a space, or any space left after a line is already complete
+        return self._sum_counts[2 * player.value + 3] > 0 or (self.is_winner(player) and self._empty > 0)
 
     def undo_move(self):
         """
@@ -143,7 +251,75 @@ class TicTacToe(Game):
             return
         
         move = self._moves_queue.popleft()
-        self._board[move[0]][move[1]] = Piece.S
+        square = move[0] * 3 + move[1]
+        value = self._squares[square]
+        self._update_hashes(move[0], move[1], PIECES[value])
+        self._update_lines(move[0], move[1], -value)
+        self._empty += 1
+        self._squares[square] = 0
+
+    def hash_key(self) -> int:
+        """
+        Zobrist hash of the current board
+
+        >>> game = TicTacToe()
+        >>> empty = game.hash_key()
+        >>> game.move(Piece.X, (1, 1), enqueue=True)
+        >>> game.hash_key() != empty
+        True
+        >>> game.undo_move()
+        >>> game.hash_key() == empty
+        True
+        """
+        return self._hashes[0]
+
+    def canonical_key(self) -> int:
+        """
+        Hash shared by all rotations and reflections of the current board
+
+        >>> game = TicTacToe()
+        >>> game.move(Piece.X, (0, 0), enqueue=True)
+        >>> corner = game.canonical_key()
+        >>> game.undo_move()
+        >>> game.move(Piece.X, (2, 0), enqueue=True)
+        >>> game.canonical_key() == corner
+        True
+        >>> game.undo_move()
+        >>> game.move(Piece.X, (1, 0), enqueue=True)
+        >>> game.canonical_key() == corner
+        False
+        >>> game.undo_move()
+        """
+        return min(self._hashes)
+
+    def position_index(self) -> int:
+        """
+        Base-3 index of the board read row by row, with each square
+        as a digit (empty 0, O 1, X 2) and the first square most significant
+
+        >>> game = TicTacToe()
+        >>> game._board = [[Piece.S, Piece.S, Piece.S], [Piece.S, Piece.S, Piece.S], [Piece.S, Piece.S, Piece.S]]
+        >>> game.position_index()
+        0
+        >>> game._board = [[Piece.S, Piece.S, Piece.S], [Piece.S, Piece.S, Piece.S], [Piece.S, Piece.X, Piece.O]]
+        >>> game.position_index()
+        7
+        """
+        index = 0
+        for value in self._squares:
+            index = index * 3 + value % 3
+
+        return index
+
+    def move_hint(self, player: Piece, move: tuple) -> int:
+        """
+        Center is part of the most lines, then corners, then edges
+
+        >>> game = TicTacToe()
+        >>> [game.move_hint(Piece.X, move) for move in [(1, 1), (0, 0), (0, 1)]]
+        [2, 1, 0]
+        """
+        return self._move_hints[move[0]][move[1]]
 
     def other(self, player: Piece) -> Piece:
         """
@@ -174,11 +350,9 @@ class TicTacToe(Game):
         >>> game.score(Piece.X, 2)
         -500.0
         """
-        allowed_moves = len(list(self.allowed_moves(None)))
-
         if self.is_winner(player):
             return 1000 / depth
-        elif allowed_moves == 0:
+        elif self._empty == 0:
             return 0
         else:
             return -1000 / depth
@@ -201,8 +375,8 @@ class TicTacToe(Game):
         >>> game.is_over()
         False
         """
-        spaces_left = any([any([col == Piece.S for col in row]) for row in self._board])
-        return self.is_winner(Piece.X) or self.is_winner(Piece.O) or not spaces_left
+        sum_counts = self._sum_counts
+        return self._empty == 0 or sum_counts[3 * Piece.X.value + 3] > 0 or sum_counts[3 * Piece.O.value + 3] > 0
 
     def is_winner(self, player: Piece) -> bool:
         """
@@ -241,13 +415,7 @@ class TicTacToe(Game):
         if player == None or player == Piece.S:
             return False
 
-        magic_number = player.value * 3
-        
-        for win_check in self._win_checks:
-            if sum((self._board[i][j].value for (i, j) in win_check)) == magic_number:
-                return True
-
-        return False
+        return self._sum_counts[3 * player.value + 3] > 0
 
     def __str__(self):
         sep = '-----------\n'
@@ -256,6 +424,29 @@ class TicTacToe(Game):
 
     __repr__ = __str__
 
+    def clone(self) -> 'TicTacToe':
+        """
+        Independent copy of the game, made without recounting the board
+
+        >>> import pickle
+        >>> game = TicTacToe()
+        >>> game.move(Piece.X, (1, 1), enqueue=True)
+        >>> copy = game.clone()
+        >>> copy.move(Piece.O, (0, 0), enqueue=True)
+        >>> (str(game._board[0][0]), str(copy._board[0][0]), len(game._moves_queue))
+        (' ', 'O', 1)
+        >>> str(pickle.loads(pickle.dumps(copy))) == str(copy)
+        True
+        """
+        game = type(self).__new__(type(self))
+        game._squares = self._squares[:]
+        game._moves_queue = deque(self._moves_queue)
+        game._hashes = self._hashes[:]
+        game._line_sums = self._line_sums[:]
+        game._sum_counts = self._sum_counts[:]
+        game._empty = self._empty
+        return game
+
 
 if __name__ == "__main__":
     import doctest
@@ -0,0 +1,19 @@
+import random
+
+
+ZOBRIST_SEED = 0x5eed
+
+
+def zobrist_table(keys, seed=ZOBRIST_SEED) -> dict:
+    """
+    Random 64-bit Zobrist value for each of `keys`
+    (seeded so hashes are reproducible between runs)
+
+    >>> table = zobrist_table([(0, 0), (0, 1)])
+    >>> table == zobrist_table([(0, 0), (0, 1)])
+    True
+    >>> table[(0, 0)] != table[(0, 1)]
+    True
+    """
+    rng = random.Random(seed)
+    return {key: rng.getrandbits(64) for key in keys}
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+
+import sys
+import json
+import math
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from ai.menace import Menace
+from ai.matchbox_store import empty_matchboxes
+from game.session import SessionManager
+from game.tictactoe import Piece
+from tournament import make_game, make_engine
+
+
+DEFAULT_PORT = 8765
+# Seconds an engine may search for one move unless a request asks otherwise
+DEFAULT_TIME_LIMIT = 1.0
+# Most seconds an engine may search for one move, whatever a request asks
+MAX_TIME_LIMIT = 30.0
+# Squares a client's game may have, so building it never holds up the event loop for long
+MAX_SQUARES = 400
+# Engines that only play games with a `position_index`, i.e. 3x3 tic-tac-toe
+TIC_TAC_TOE_ENGINES = ('menace', 'solution')
+
+
+def search(engine, game, time_limit: float):
+    """
+    Best move of `engine` in `game`, run in the executor
+    """
+    engine.negamax(game, time_limit=time_limit)
+    return engine.get_best_move()
+
+
+class GameServer(object):
+    """
+    Hosts games over a line-delimited JSON protocol: every request is one
+    JSON object on its own line, answered by one JSON object on its own line
+
+    Requests have an 'op' and echo back an optional 'id':
+
+    - 'new': starts a game ('game', default 'ttt', with at most `MAX_SQUARES`
+      squares) against an engine ('engine', default 'negamax') playing
+      'engine_player' (default 'O'); X moves first
+    - 'move': plays 'move' (a list of coordinates) in 'session'
+    - 'ai': the engine picks and plays its move in 'session', searching
+      for at most 'time_limit' seconds (no more than `max_time_limit`)
+    - 'state': the current state of 'session'
+    - 'close': ends 'session'
+
+    Responses have 'ok' and either the session state or an 'error'
+
+    Each 'menace' session draws from its own `Menace`, so games never mix
+    their moves, but all of them share one set of matchboxes and learn
+    from every finished game. Searches run on `executor`, by default a
+    thread pool, which keeps the event loop answering but lets only one
+    search hold the GIL at a time, so sessions searching at once share
+    one core. A process pool would search in parallel, but each move
+    would then be searched by a copy of the engine, losing MCTS trees
+    and the moves MENACE has to learn from
+
+    >>> server = GameServer()
+    >>> asyncio.run(server.handle({'op': 'new', 'id': 7}))['session']
+    1
+    >>> asyncio.run(server.handle({'op': 'move', 'session': 1, 'move': [0, 0]}))['to_move']
+    'O'
+    >>> asyncio.run(server.handle({'op': 'move', 'session': 1, 'move': [1, 1]}))
+    {'ok': False, 'error': "it is the engine's turn"}
+    >>> asyncio.run(server.handle({'op': 'ai', 'session': 1, 'time_limit': float('inf')}))
+    {'ok': False, 'error': 'time_limit must be a finite number of seconds above 0'}
+    >>> asyncio.run(server.handle({'op': 'ai', 'session': 1}))['to_move']
+    'X'
+    >>> asyncio.run(server.handle({'op': 'move', 'session': 1, 'move': [0, 0]}))
+    {'ok': False, 'error': 'illegal move (0, 0)'}
+    >>> asyncio.run(server.handle({'op': 'new', 'game': 'mnk:4x4:3', 'engine': 'menace'}))
+    {'ok': False, 'error': "'menace' only plays 3x3 tic-tac-toe"}
+    >>> asyncio.run(server.handle({'op': 'new', 'engine': 5}))
+    {'ok': False, 'error': 'engine must be a string'}
+    >>> asyncio.run(server.handle({'op': 'new', 'game': 'mnk:4x4'}))
+    {'ok': False, 'error': "unknown game 'mnk:4x4'"}
+    >>> asyncio.run(server.handle({'op': 'new', 'game': 'mnk:100x100:5'}))
+    {'ok': False, 'error': "'mnk:100x100:5' has 10000 squares, more than 400"}
+    >>> asyncio.run(server.handle({'op': 'state', 'session': 2}))
+    {'ok': False, 'error': 'unknown session 2'}
+    >>> server.close()
+    """
+    def __init__(self, time_limit=DEFAULT_TIME_LIMIT, executor=None, max_time_limit=MAX_TIME_LIMIT):
+        self._sessions = SessionManager(lambda: make_game('ttt'), Piece.X)
+        self._engines = dict()
+        self._locks = dict()
+        self._matchboxes = empty_matchboxes()
+        self._time_limit = min(time_limit, max_time_limit)
+        self._max_time_limit = max_time_limit
+        self._executor = executor or ThreadPoolExecutor()
+        self._handlers = {
+            'new': self._new,
+            'move': self._move,
+            'ai': self._ai,
+            'state': self._state,
+            'close': self._close
+        }
+
+    async def handle(self, request: dict) -> dict:
+        """
+        Response to one decoded request
+        """
+        try:
+            handler = self._handlers.get(request.get('op'))
+            if handler is None:
+                raise ValueError(f"unknown op {request.get('op')!r}")
+
+            response = {'ok': True} | await handler(request)
+        except (ValueError, TypeError) as e:
+            response = {'ok': False, 'error': str(e)}
+
+        if 'id' in request:
+            response['id'] = request['id']
+
+        return response
+
+    async def serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Answers the requests of one connection in order until it closes
+
+        >>> import os, tempfile
+        >>> async def play(path):
+        ...     server = GameServer()
+        ...     listener = await asyncio.start_unix_server(server.serve_client, path)
+        ...     (reader, writer) = await asyncio.open_unix_connection(path)
+        ...     responses = list()
+        ...     for request in [{'op': 'new'}, {'op': 'move', 'session': 1, 'move': [1, 1]}, {'op': 'ai', 'session': 1}]:
+        ...         writer.write(json.dumps(request).encode() + b'\\n')
+        ...         responses.append(json.loads(await reader.readline()))
+        ...     writer.write_eof()
+        ...     await reader.read()
+        ...     writer.close()
+        ...     listener.close()
+        ...     await listener.wait_closed()
+        ...     server.close()
+        ...     return responses
+        >>> responses = asyncio.run(play(os.path.join(tempfile.mkdtemp(), 'server.sock')))
+        >>> [response['ok'] for response in responses]
+        [True, True, True]
+        >>> responses[-1]['move'] in [[0, 0], [0, 2], [2, 0], [2, 2]]
+        True
+        """
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    response = {'ok': False, 'error': 'invalid JSON'}
+                else:
+                    if isinstance(request, dict):
+                        response = await self.handle(request)
+                    else:
+                        response = {'ok': False, 'error': 'request must be an object'}
+
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        finally:
+            writer.close()
+
+    def _session(self, request: dict):
+        session_id = request.get('session')
+        if session_id not in self._sessions:
+            raise ValueError(f'unknown session {session_id}')
+
+        return self._sessions[session_id]
+
+    def _spec(self, request: dict, key: str, default: str) -> str:
+        """
+        Game or engine spec given as `key` in `request`
+        """
+        spec = request.get(key, default)
+        if not isinstance(spec, str):
+            raise ValueError(f'{key} must be a string')
+
+        return spec
+
+    def _request_time_limit(self, request: dict) -> float:
+        """
+        Seconds the engine may search for, as asked for in `request`
+        """
+        time_limit = request.get('time_limit', self._time_limit)
+        if isinstance(time_limit, bool) or not isinstance(time_limit, (int, float)):
+            raise ValueError('time_limit must be a number')
+        # Whole numbers are always finite, but may be too big to make a float of
+        if time_limit <= 0 or (isinstance(time_limit, float) and not math.isfinite(time_limit)):
+            raise ValueError('time_limit must be a finite number of seconds above 0')
+
+        return float(min(time_limit, self._max_time_limit))
+
+    def _describe(self, session) -> dict:
+        """
+        State of `session` as sent to clients
+        """
+        game = session.game
+        winner = session.winner()
+
+        return {
+            'session': session.id,
+            'board': str(game),
+            'to_move': str(session.player),
+            'over': game.is_over(),
+            'winner': None if winner is None else str(winner)
+        }
+
+    async def _new(self, request: dict) -> dict:
+        engine_player = {'X': Piece.X, 'O': Piece.O}.get(request.get('engine_player', 'O'))
+        if engine_player is None:
+            raise ValueError('engine must play X or O')
+
+        engine_spec = self._spec(request, 'engine', 'negamax')
+        game = make_game(self._spec(request, 'game', 'ttt'), MAX_SQUARES)
+        if engine_spec.partition(':')[0] in TIC_TAC_TOE_ENGINES and not hasattr(game, 'position_index'):
+            raise ValueError(f'{engine_spec!r} only plays 3x3 tic-tac-toe')
+
+        seed = request.get('seed', 0)
+        if isinstance(seed, bool) or not isinstance(seed, int):
+            raise ValueError('seed must be a whole number')
+        engine = make_engine(engine_spec, engine_player, seed, Menace(seed=seed, matchboxes=self._matchboxes))
+
+        session = self._sessions.open(game)
+        self._engines[session.id] = engine
+        self._locks[session.id] = asyncio.Lock()
+
+        return self._describe(session)
+
+    async def _move(self, request: dict) -> dict:
+        session = self._session(request)
+
+        async with self._locks[session.id]:
+            if session.player == self._engines[session.id].player:
+                raise ValueError("it is the engine's turn")
+
+            session.play(tuple(request.get('move', ())))
+            self._settle(session)
+
+        return self._describe(session)
+
+    async def _ai(self, request: dict) -> dict:
+        session = self._session(request)
+        engine = self._engines[session.id]
+        time_limit = self._request_time_limit(request)
+
+        async with self._locks[session.id]:
+            if session.player != engine.player:
+                raise ValueError("not the engine's turn")
+            if session.game.is_over():
+                raise ValueError('game is over')
+
+            # Search a copy so the session stays readable while the engine works
+            try:
+                move = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, search, engine, session.game.clone(), time_limit
+                )
+            except Exception as e:
+                raise ValueError(f'engine failed: {e}') from e
+            if move is None:
+                raise ValueError('engine found no move')
+
+            session.play(move)
+            self._settle(session)
+
+        return self._describe(session) | {'move': list(move)}
+
+    def _settle(self, session):
+        """
+        Let the engine of `session` learn from its game once it is over
+        """
+        engine = self._engines[session.id]
+        if session.game.is_over() and hasattr(engine, 'game_over'):
+            engine.game_over(session.winner())
+
+    async def _state(self, request: dict) -> dict:
+        return self._describe(self._session(request))
+
+    async def _close(self, request: dict) -> dict:
+        session = self._session(request)
+
+        self._sessions.close(session.id)
+        del self._engines[session.id]
+        del self._locks[session.id]
+
+        return {'session': session.id}
+
+    def close(self):
+        """
+        Shut down the search executor
+        """
+        self._executor.shutdown()
+
+
+async def serve(server: GameServer, host: str, port: int, unix_path=None):
+    if unix_path is not None:
+        listener = await asyncio.start_unix_server(server.serve_client, unix_path)
+    else:
+        listener = await asyncio.start_server(server.serve_client, host, port)
+
+    async with listener:
+        await listener.serve_forever()
+
+
+def main(argv: list):
+    parser = argparse.ArgumentParser(description='Serve games over line-delimited JSON')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', help='listen on this Unix socket instead of TCP')
+    parser.add_argument('--time-limit', type=float, default=DEFAULT_TIME_LIMIT, help='default seconds per engine move')
+    parser.add_argument(
+        '--max-time-limit', type=float, default=MAX_TIME_LIMIT, help='most seconds per engine move a client may ask for'
+    )
+    args = parser.parse_args(argv)
+
+    for (name, seconds) in (('--time-limit', args.time_limit), ('--max-time-limit', args.max_time_limit)):
+        if not (math.isfinite(seconds) and seconds > 0):
+            parser.error(f'{name} must be a finite number of seconds above 0')
+
+    server = GameServer(args.time_limit, max_time_limit=args.max_time_limit)
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
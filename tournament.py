@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+
+import sys
+import math
+import time
+import json
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from ai.mcts import MctsAi
+from ai.negamax import Ai
+from ai.menace import Menace, game_end
+from ai.random_ai import RandomAi
+from ai.solution_table import SolutionAi
+from game.bitboard import BitboardTicTacToe
+from game.mnk import MNKGame
+from game.tictactoe import Piece
+
+
+class MenaceAi(object):
+    """
+    Adapts `Menace` to the `negamax`/`get_best_move` surface of `Ai`
+    """
+    def __init__(self, player: Piece, menace: Menace):
+        self._player = player
+        self._menace = menace
+        self._best_move = None
+
+    def negamax(self, game, time_limit=None, node_limit=None):
+        self._best_move = self._menace.best_move(game, self._player)
+
+    def get_best_move(self):
+        return self._best_move
+
+    def game_over(self, winner):
+        """
+        Reward or punish the moves MENACE played in the finished game
+        """
+        self._menace.update(game_end(self._player, winner), self._player)
+
+    @property
+    def player(self):
+        return self._player
+
+
+def make_game(spec: str, max_squares=None):
+    """
+    Game for `spec`: 'ttt' for 3x3 tic-tac-toe or 'mnk:MxN:K',
+    with at most `max_squares` squares if given
+
+    >>> make_game('mnk:4x4:3').shape
+    (4, 4)
+    >>> make_game('mnk:100x100:5', max_squares=400)
+    Traceback (most recent call last):
+    ...
+    ValueError: 'mnk:100x100:5' has 10000 squares, more than 400
+    """
+    if spec == 'ttt':
+        return BitboardTicTacToe()
+
+    try:
+        (kind, shape, k) = spec.split(':')
+        shape = tuple(int(size) for size in shape.split('x'))
+        k = int(k)
+    except ValueError:
+        raise ValueError(f'unknown game {spec!r}') from None
+
+    if kind != 'mnk':
+        raise ValueError(f'unknown game {spec!r}')
+    if min(shape) < 1 or not 1 <= k <= max(shape):
+        raise ValueError(f'{spec!r} needs sides of at least 1 and K between 1 and the longest side')
+
+    squares = math.prod(shape)
+    if max_squares is not None and squares > max_squares:
+        raise ValueError(f'{spec!r} has {squares} squares, more than {max_squares}')
+
+    return MNKGame(shape, k)
+
+
+def make_engine(spec: str, player: Piece, seed: int, menace: Menace):
+    """
+    Engine for `spec` playing `player`: 'negamax[:DEPTH]', 'mcts[:ITERATIONS]',
+    'solution', 'menace' (tic-tac-toe only) or 'random'
+
+    >>> make_engine('negamax:4', Piece.X, 0, None)._max_depth
+    4
+    >>> make_engine('mcts:500', Piece.X, 0, None)._iterations
+    500
+    >>> make_engine('negamax:0', Piece.X, 0, None)
+    Traceback (most recent call last):
+    ...
+    ValueError: unknown engine 'negamax:0'
+    """
+    (name, _, arg) = spec.partition(':')
+
+    if arg:
+        try:
+            number = int(arg)
+        except ValueError:
+            number = 0
+        if name not in ('negamax', 'mcts') or number < 1:
+            raise ValueError(f'unknown engine {spec!r}')
+
+    if name == 'negamax':
+        return Ai(player, number) if arg else Ai(player)
+    elif name == 'mcts':
+        return MctsAi(player, number, seed=seed) if arg else MctsAi(player, seed=seed)
+    elif name == 'solution':
+        return SolutionAi(player)
+    elif name == 'menace':
+        return MenaceAi(player, menace)
+    elif name == 'random':
+        return RandomAi(player, seed)
+
+    raise ValueError(f'unknown engine {spec!r}')
+
+
+def play_game(game, engines: dict) -> tuple:
+    """
+    Play `game` to the end between `engines` (by piece, X moves first)
+
+    Returns the winning piece (None for a draw) and each
+    piece's list of move latencies in seconds
+    """
+    latencies = {piece: list() for piece in engines}
+    player = Piece.X
+
+    while not game.is_over():
+        engine = engines[player]
+
+        start_time = time.perf_counter()
+        engine.negamax(game)
+        move = engine.get_best_move()
+        latencies[player].append(time.perf_counter() - start_time)
+
+        if move is None:
+            # Forfeit
+            return (player.other(), latencies)
+
+        game.move(player, move, enqueue=True)
+        player = player.other()
+
+    for piece in engines:
+        if game.is_winner(piece):
+            return (piece, latencies)
+
+    return (None, latencies)
+
+
+def play_games(game_spec: str, engine_specs: list, first_game: int, games: int, seed: int) -> dict:
+    """
+    Play `games` games in one worker, alternating which engine moves first
+
+    Returns win counts by engine index ('draw' for draws)
+    and move latencies by engine index
+    """
+    results = Counter()
+    latencies = {index: list() for index in range(len(engine_specs))}
+    menace = Menace(seed=seed + first_game)
+
+    # Made once for each engine and piece it plays, so tables are only
+    # loaded once and trees are kept from one game to the next
+    pairings = [(index, piece) for index in range(len(engine_specs)) for piece in (Piece.X, Piece.O)]
+    made = {
+        (index, piece): make_engine(engine_specs[index], piece, seed + first_game * len(pairings) + number, menace)
+        for (number, (index, piece)) in enumerate(pairings)
+    }
+
+    for number in range(first_game, first_game + games):
+        # Engine 0 plays X in even games and O in odd games
+        order = [0, 1] if number % 2 == 0 else [1, 0]
+        engines = {piece: made[(index, piece)] for (piece, index) in zip((Piece.X, Piece.O), order)}
+        indices = dict(zip((Piece.X, Piece.O), order))
+
+        (winner, game_latencies) = play_game(make_game(game_spec), engines)
+
+        # Settle anything engines carry over from the game just played
+        for engine in engines.values():
+            if hasattr(engine, 'game_over'):
+                engine.game_over(winner)
+
+        results['draw' if winner is None else indices[winner]] += 1
+        for (piece, values) in game_latencies.items():
+            latencies[indices[piece]].extend(values)
+
+    return {'results': results, 'latencies': latencies}
+
+
+def percentile(values: list, p: float) -> float:
+    """
+    Nearest-rank `p`th percentile of sorted `values`
+
+    >>> percentile([1, 2, 3, 4], 50)
+    2
+    >>> percentile([1, 2, 3, 4], 99)
+    4
+    """
+    if len(values) == 0:
+        return 0
+
+    rank = math.ceil(p / 100 * len(values))
+    return values[max(rank, 1) - 1]
+
+
+def run(game_spec: str, engine_specs: list, games: int, workers: int, seed=0) -> dict:
+    """
+    Play `games` games between two engines across `workers` processes
+    and summarize results, throughput and move latencies
+    """
+    chunk = -(-games // workers)
+    start_time = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(play_games, game_spec, engine_specs, first, min(chunk, games - first), seed)
+            for first in range(0, games, chunk)
+        ]
+        parts = [future.result() for future in futures]
+
+    elapsed = time.perf_counter() - start_time
+
+    results = Counter()
+    latencies = {index: list() for index in range(len(engine_specs))}
+    for part in parts:
+        results.update(part['results'])
+        for (index, values) in part['latencies'].items():
+            latencies[index].extend(values)
+
+    report = {
+        'game': game_spec,
+        'games': games,
+        'seconds': elapsed,
+        'games_per_second': games / elapsed,
+        'draws': results['draw'],
+        'engines': list()
+    }
+
+    for (index, spec) in enumerate(engine_specs):
+        values = sorted(latencies[index])
+        report['engines'].append({
+            'engine': spec,
+            'wins': results[index],
+            'moves': len(values),
+            'latency_ms': {
+                f'p{p}': percentile(values, p) * 1000 for p in (50, 90, 99)
+            } | {'max': (values[-1] if values else 0) * 1000}
+        })
+
+    return report
+
+
+def print_report(report: dict):
+    print(f"{report['games']} games of {report['game']} in {report['seconds']:.2f}s "
+          f"({report['games_per_second']:.1f} games/s), {report['draws']} draws")
+
+    for engine in report['engines']:
+        latency = ', '.join(f'{name} {ms:.3f}ms' for (name, ms) in engine['latency_ms'].items())
+        print(f"  {engine['engine']}: {engine['wins']} wins, {engine['moves']} moves, {latency}")
+
+
+def main(argv: list):
+    parser = argparse.ArgumentParser(description='Play engines against each other headlessly')
+    parser.add_argument('engines', nargs=2, help="'negamax[:DEPTH]', 'mcts[:ITERATIONS]', 'solution', 'menace' or 'random'")
+    parser.add_argument('--game', default='ttt', help="'ttt' or 'mnk:MxN:K' (default: ttt)")
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args(argv)
+
+    if args.games < 1:
+        parser.error('--games must be at least 1')
+    if args.workers < 1:
+        parser.error('--workers must be at least 1')
+
+    report = run(args.game, args.engines, args.games, args.workers, args.seed)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])